@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内评估运行器
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+
+from fusion_evaluator import FusionEvaluator, save_test_configuration, get_metrics_sampler, logger
+
+class EvaluatorRunner:
+    """在常驻工作线程中直接调用FusionEvaluator，避免每次运行都启动新的Python解释器"""
+
+    def __init__(self, max_workers: int = 1):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="evaluator")
+        # 预热：提前启动指标采样器，首次运行无需等待第一份快照
+        self._executor.submit(get_metrics_sampler)
+
+    def execute(self, evaluate: bool = False, log_callback: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+        """在当前线程执行一次运行：生成并保存测试配置，可选运行综合评估"""
+        start_time = time.time()
+        evaluator = FusionEvaluator(log_callback=log_callback)
+        result = save_test_configuration(evaluator)
+        if evaluate:
+            # 配置了多个目标时并发评估全部目标，生成按目标汇总的报告
+            if len(evaluator.config_manager.get_targets()) > 1:
+                result['report'] = asyncio.run(evaluator.run_multi_target_evaluation())
+            else:
+                result['report'] = asyncio.run(evaluator.run_comprehensive_evaluation())
+        result['duration'] = time.time() - start_time
+        result['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        logger.info(f"✅ 评估运行完成: {result['filename']} ({result['duration']:.2f}秒)")
+        return result
+
+    def submit(self, evaluate: bool = False, log_callback: Optional[Callable[[str, str], None]] = None):
+        """提交到工作线程，返回Future"""
+        return self._executor.submit(self.execute, evaluate, log_callback)
+
+    def submit_task(self, fn: Callable, *args):
+        """在同一组工作线程上执行任意任务，共享并发上限"""
+        return self._executor.submit(fn, *args)
+
+    def run(self, evaluate: bool = False, timeout: Optional[float] = 60) -> Dict[str, Any]:
+        """提交到工作线程并等待结果，超时抛出concurrent.futures.TimeoutError"""
+        return self.submit(evaluate).result(timeout=timeout)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+_runner: Optional[EvaluatorRunner] = None
+_runner_lock = threading.Lock()
+
+def get_evaluator_runner() -> EvaluatorRunner:
+    """获取进程内共享的评估运行器"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = EvaluatorRunner()
+        return _runner
+
+class EvaluationJob:
+    """一次异步评估任务，记录状态、结果与日志事件"""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = 'queued'
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('succeeded', 'failed')
+
+    def add_event(self, level: str, message: str):
+        """追加日志事件并唤醒等待中的订阅者"""
+        with self._cond:
+            self.events.append({'level': level, 'message': message, 'time': time.time()})
+            self._cond.notify_all()
+
+    def set_status(self, status: str, result: Dict[str, Any] = None, error: str = None):
+        with self._cond:
+            self.status = status
+            if status == 'running':
+                self.started_at = datetime.now().isoformat()
+            elif status in ('succeeded', 'failed'):
+                self.finished_at = datetime.now().isoformat()
+                self.result = result
+                self.error = error
+            self._cond.notify_all()
+
+    def iter_events(self, start: int = 0, keepalive: float = 15.0) -> Iterator[Optional[Tuple[int, Dict[str, Any]]]]:
+        """按序产出(序号, 事件)，任务结束后停止；等待超过keepalive秒时产出None用于保活"""
+        index = start
+        while True:
+            with self._cond:
+                if index >= len(self.events) and not self.finished:
+                    self._cond.wait(keepalive)
+                pending = self.events[index:]
+                finished = self.finished
+            if not pending and not finished:
+                yield None
+            for event in pending:
+                yield index, event
+                index += 1
+            if finished and index >= len(self.events):
+                return
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'params': self.params,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'event_count': len(self.events),
+            'error': self.error
+        }
+        if include_result:
+            data['result'] = self.result
+        return data
+
+class EvaluationJobQueue:
+    """评估任务队列：立即返回任务ID，由运行器的工作线程按上限并发执行，重复提交合并为同一任务"""
+
+    def __init__(self, runner: EvaluatorRunner, max_history: int = 100):
+        self.runner = runner
+        self.max_history = max_history
+        self._lock = threading.Lock()
+        self._jobs: 'OrderedDict[str, EvaluationJob]' = OrderedDict()
+        self._active: Dict[Tuple, EvaluationJob] = {}
+
+    def submit(self, evaluate: bool = False) -> Tuple[EvaluationJob, bool]:
+        """提交任务，返回(任务, 是否新建)；相同参数的任务仍在排队或运行时直接复用"""
+        key = ('evaluate', evaluate)
+        with self._lock:
+            existing = self._active.get(key)
+            if existing is not None and not existing.finished:
+                return existing, False
+            job = EvaluationJob({'evaluate': evaluate})
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._prune()
+        job.add_event('info', '任务已进入队列')
+        self.runner.submit_task(self._run_job, job, key)
+        return job, True
+
+    def _run_job(self, job: EvaluationJob, key: Tuple):
+        job.set_status('running')
+        job.add_event('info', '任务开始运行')
+        try:
+            result = self.runner.execute(job.params['evaluate'], log_callback=job.add_event)
+            job.add_event('info', f"任务完成: {result['filename']}")
+            job.set_status('succeeded', result=result)
+        except Exception as e:
+            logger.error(f"❌ 评估任务失败: {e}")
+            job.add_event('error', f"任务失败: {e}")
+            job.set_status('failed', error=str(e))
+        finally:
+            with self._lock:
+                if self._active.get(key) is job:
+                    del self._active[key]
+
+    def _prune(self):
+        """只保留最近max_history个任务（调用方需持有锁）"""
+        while len(self._jobs) > self.max_history:
+            oldest_id = next(iter(self._jobs))
+            if not self._jobs[oldest_id].finished:
+                break
+            del self._jobs[oldest_id]
+
+    def get(self, job_id: str) -> Optional[EvaluationJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[EvaluationJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+_job_queue: Optional[EvaluationJobQueue] = None
+
+def get_job_queue() -> EvaluationJobQueue:
+    """获取进程内共享的评估任务队列"""
+    global _job_queue
+    runner = get_evaluator_runner()
+    with _runner_lock:
+        if _job_queue is None:
+            _job_queue = EvaluationJobQueue(runner)
+        return _job_queue
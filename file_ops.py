@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件传输与管理操作
+"""
+
+import errno
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# ioctl(FICLONE)：在支持的文件系统（btrfs/xfs等）上共享数据块的写时复制克隆
+FICLONE = 0x40049409
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 表示"当前方式不被支持，换下一种"的错误码
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EPERM, errno.EACCES, errno.EMLINK, errno.ENOSYS,
+    errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF, errno.ETXTBSY
+}
+if hasattr(errno, 'ENOTSUP'):
+    UNSUPPORTED_ERRNOS.add(errno.ENOTSUP)
+
+def _reflink(src_fd: int, dst_fd: int, size: int) -> bool:
+    if fcntl is None:
+        return False
+    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    return True
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int) -> bool:
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(src_fd, dst_fd, size - copied)
+        if n == 0:
+            break
+        copied += n
+    # 部分文件系统不报错而是直接返回0，数据不完整时视为不支持，换下一种方式
+    return copied >= size
+
+def _sendfile(src_fd: int, dst_fd: int, size: int) -> bool:
+    if not hasattr(os, 'sendfile'):
+        return False
+    offset = 0
+    while offset < size:
+        n = os.sendfile(dst_fd, src_fd, offset, size - offset)
+        if n == 0:
+            break
+        offset += n
+    return offset >= size
+
+def _chunked_copy(src_fd: int, dst_fd: int, size: int) -> bool:
+    while True:
+        chunk = os.read(src_fd, COPY_CHUNK_SIZE)
+        if not chunk:
+            return True
+        view = memoryview(chunk)
+        while view:
+            written = os.write(dst_fd, view)
+            view = view[written:]
+
+# 按优先级排列的数据复制方式
+COPY_METHODS = (
+    ('reflink', _reflink),
+    ('copy_file_range', _copy_file_range),
+    ('sendfile', _sendfile),
+    ('chunked', _chunked_copy)
+)
+
+def copy_file(src: str, dst: str) -> str:
+    """复制单个文件数据并保留元数据（同shutil.copy2），依次尝试reflink、copy_file_range、sendfile，最后分块复制；返回实际使用的方式"""
+    src_fd = os.open(src, os.O_RDONLY)
+    created = False
+    try:
+        size = os.fstat(src_fd).st_size
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        created = True
+        try:
+            for method, copier in COPY_METHODS:
+                try:
+                    if copier(src_fd, dst_fd, size):
+                        break
+                except OSError as e:
+                    if e.errno not in UNSUPPORTED_ERRNOS:
+                        raise
+                # 失败的方式可能已写入部分数据，回到起点再试下一种
+                os.ftruncate(dst_fd, 0)
+                os.lseek(src_fd, 0, os.SEEK_SET)
+                os.lseek(dst_fd, 0, os.SEEK_SET)
+        finally:
+            os.close(dst_fd)
+        shutil.copystat(src, dst)
+    except BaseException:
+        if created:
+            os.remove(dst)
+        raise
+    finally:
+        os.close(src_fd)
+    return method
+
+def transfer_path(src: str, dst: str, allow_link: bool = True) -> Dict[str, Any]:
+    """传输文件或目录到dst（dst不得已存在），同一文件系统上优先硬链接（只改元数据，耗时与文件大小无关）；返回各方式使用次数"""
+    if os.path.lexists(dst):
+        raise FileExistsError(errno.EEXIST, '目标已存在', dst)
+    methods = Counter()
+
+    def transfer_one(src_file: str, dst_file: str):
+        if allow_link:
+            try:
+                os.link(src_file, dst_file)
+                methods['hardlink'] += 1
+                return dst_file
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+        methods[copy_file(src_file, dst_file)] += 1
+        return dst_file
+
+    if os.path.isdir(src):
+        shutil.copytree(src, dst, copy_function=transfer_one)
+    else:
+        transfer_one(src, dst)
+    method = methods.most_common(1)[0][0] if methods else 'empty'
+    logger.info(f"✅ 传输完成: {src} -> {dst} ({dict(methods)})")
+    return {'method': method, 'methods': dict(methods)}
+
+# 批量操作共享的有界线程池
+BULK_MAX_WORKERS = 8
+_bulk_executor = ThreadPoolExecutor(max_workers=BULK_MAX_WORKERS, thread_name_prefix="bulk-ops")
+
+def is_safe_name(name: Any) -> bool:
+    """只允许文件夹内的单级文件名，拒绝路径分隔符与 . / .."""
+    return (isinstance(name, str) and name not in ('', '.', '..')
+            and os.sep not in name and (os.altsep is None or os.altsep not in name))
+
+def remove_path(path: str):
+    """删除文件或目录"""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+def staging_dir_for(folder: str) -> str:
+    """与folder位于同一文件系统、但不在其内部的暂存目录，保证移动为原子rename且不出现在监控列表中"""
+    parent = os.path.dirname(os.path.abspath(folder))
+    return os.path.join(parent, '.trash', os.path.basename(os.path.abspath(folder)))
+
+class TrashTask:
+    """一次后台清理任务的进度"""
+
+    def __init__(self, path: str, name: str):
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.name = name
+        self.status = 'pending'
+        self.files_found = 0
+        self.files_removed = 0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'task_id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'files_found': self.files_found,
+            'files_removed': self.files_removed,
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+class TrashReaper:
+    """后台回收站清理：单线程遍历目录树，文件分批交给线程池并行unlink，最后自底向上删除目录"""
+
+    def __init__(self, workers: int = 8, batch_size: int = 256, max_history: int = 100):
+        self.batch_size = batch_size
+        self.max_history = max_history
+        self._unlink_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trash-unlink")
+        self._queue: 'queue.Queue[TrashTask]' = queue.Queue()
+        self._tasks: 'OrderedDict[str, TrashTask]' = OrderedDict()
+        self._known_roots = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'TrashReaper':
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trash-reaper", daemon=True)
+                self._thread.start()
+        return self
+
+    def submit(self, path: str, name: str = None) -> TrashTask:
+        """登记待清理路径（应已位于回收站中）"""
+        task = TrashTask(path, name or os.path.basename(path))
+        with self._lock:
+            self._tasks[task.id] = task
+            while len(self._tasks) > self.max_history:
+                oldest = next(iter(self._tasks.values()))
+                if oldest.status in ('pending', 'running'):
+                    break
+                self._tasks.popitem(last=False)
+        self._queue.put(task)
+        self.start()
+        return task
+
+    def recover(self, trash_root: str):
+        """把回收站中遗留（例如进程重启前未清理完）的条目重新加入清理队列"""
+        with self._lock:
+            if trash_root in self._known_roots:
+                return
+            self._known_roots.add(trash_root)
+        try:
+            with os.scandir(trash_root) as it:
+                leftovers = [entry.path for entry in it]
+        except FileNotFoundError:
+            return
+        for path in leftovers:
+            self.submit(path)
+
+    def move_to_trash(self, folder: str, name: str) -> TrashTask:
+        """把folder/name原子rename进回收站并立即返回，数据由后台线程删除"""
+        trash_root = staging_dir_for(folder)
+        self.recover(trash_root)
+        holder = os.path.join(trash_root, uuid.uuid4().hex)
+        os.makedirs(holder)
+        try:
+            os.rename(os.path.join(folder, name), os.path.join(holder, os.path.basename(name)))
+        except OSError:
+            os.rmdir(holder)
+            raise
+        return self.submit(holder, name)
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            task.status = 'running'
+            try:
+                self._purge(task)
+                task.status = 'done'
+            except Exception as e:
+                logger.error(f"❌ 回收站清理失败: {task.path}: {e}")
+                task.status = 'failed'
+                task.error = str(e)
+            task.finished_at = time.time()
+
+    def _unlink_batch(self, task: TrashTask, paths: List[str]):
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            task.files_removed += len(paths)
+
+    def _purge(self, task: TrashTask):
+        if not os.path.isdir(task.path) or os.path.islink(task.path):
+            if os.path.lexists(task.path):
+                task.files_found = 1
+                self._unlink_batch(task, [task.path])
+            return
+        directories = []
+        futures = []
+        batch = []
+        stack = [task.path]
+        while stack:
+            directory = stack.pop()
+            directories.append(directory)
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    batch.append(entry.path)
+                    task.files_found += 1
+                    if len(batch) >= self.batch_size:
+                        futures.append(self._unlink_executor.submit(self._unlink_batch, task, batch))
+                        batch = []
+        if batch:
+            futures.append(self._unlink_executor.submit(self._unlink_batch, task, batch))
+        for future in wait(futures).done:
+            future.result()
+        # 子目录总在父目录之后入列，逆序即可自底向上删除
+        for directory in reversed(directories):
+            os.rmdir(directory)
+
+    def get(self, task_id: str) -> Optional[TrashTask]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def list(self) -> List[TrashTask]:
+        with self._lock:
+            return list(self._tasks.values())
+
+_trash_reaper: Optional[TrashReaper] = None
+_trash_reaper_lock = threading.Lock()
+
+def get_trash_reaper() -> TrashReaper:
+    """获取进程内共享的回收站清理器"""
+    global _trash_reaper
+    with _trash_reaper_lock:
+        if _trash_reaper is None:
+            _trash_reaper = TrashReaper()
+        return _trash_reaper
+
+def _run_parallel(items: List[Any], operation: Callable[[Any], Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """在共享线程池中执行，单项异常记录到该项结果中"""
+    def wrapped(item):
+        try:
+            return operation(item)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    return list(_bulk_executor.map(wrapped, items))
+
+def _precheck(checks: List[Tuple[str, Optional[str]]], atomic: bool) -> Tuple[List[Dict[str, Any]], bool]:
+    """checks为(名称, 错误或None)；原子模式下任一失败则全部跳过"""
+    failed = any(error for _, error in checks)
+    results = []
+    for name, error in checks:
+        if error:
+            results.append({'name': name, 'success': False, 'error': error})
+        elif atomic and failed:
+            results.append({'name': name, 'success': False, 'error': '批次中存在失败项，已整体取消'})
+        else:
+            results.append(None)
+    return results, failed
+
+def bulk_transfer(src_folder: str, dst_folder: str, names: List[str], atomic: bool = False,
+                  allow_link: bool = True) -> List[Dict[str, Any]]:
+    """批量传输；原子模式下任一失败则删除本批次已传输的目标"""
+    checks = []
+    for name in names:
+        if not is_safe_name(name):
+            checks.append((name, f'无效的文件名: {name}'))
+        elif not os.path.lexists(os.path.join(src_folder, name)):
+            checks.append((name, f'源文件 {name} 不存在'))
+        elif os.path.lexists(os.path.join(dst_folder, name)):
+            checks.append((name, f'目标文件 {name} 已存在'))
+        else:
+            checks.append((name, None))
+    results, failed = _precheck(checks, atomic)
+    if atomic and failed:
+        return results
+
+    os.makedirs(dst_folder, exist_ok=True)
+    pending = [name for name, result in zip(names, results) if result is None]
+
+    def transfer(name):
+        result = transfer_path(os.path.join(src_folder, name), os.path.join(dst_folder, name), allow_link)
+        return {'success': True, **result}
+
+    done = dict(zip(pending, _run_parallel(pending, transfer)))
+    if atomic and not all(r['success'] for r in done.values()):
+        for name, result in done.items():
+            if result['success']:
+                remove_path(os.path.join(dst_folder, name))
+                done[name] = {'success': False, 'error': '批次中存在失败项，已回滚'}
+    return [result if result is not None else {'name': name, **done[name]}
+            for name, result in zip(names, results)]
+
+def bulk_rename(folder: str, renames: List[Tuple[str, str]], atomic: bool = False) -> List[Dict[str, Any]]:
+    """批量重命名；原子模式下任一失败则把已重命名的条目改回原名"""
+    checks = []
+    new_names = [new_name for _, new_name in renames]
+    for old_name, new_name in renames:
+        if not is_safe_name(old_name) or not is_safe_name(new_name):
+            checks.append((old_name, f'无效的文件名: {old_name} -> {new_name}'))
+        elif not os.path.lexists(os.path.join(folder, old_name)):
+            checks.append((old_name, f'文件 {old_name} 不存在'))
+        elif os.path.lexists(os.path.join(folder, new_name)) or new_names.count(new_name) > 1:
+            checks.append((old_name, f'文件 {new_name} 已存在'))
+        else:
+            checks.append((old_name, None))
+    results, failed = _precheck(checks, atomic)
+    if atomic and failed:
+        return results
+
+    pending = [pair for pair, result in zip(renames, results) if result is None]
+
+    def rename(pair):
+        old_name, new_name = pair
+        os.rename(os.path.join(folder, old_name), os.path.join(folder, new_name))
+        return {'success': True, 'new_name': new_name}
+
+    done = dict(zip(pending, _run_parallel(pending, rename)))
+    if atomic and not all(r['success'] for r in done.values()):
+        for (old_name, new_name), result in done.items():
+            if result['success']:
+                os.rename(os.path.join(folder, new_name), os.path.join(folder, old_name))
+                done[(old_name, new_name)] = {'success': False, 'error': '批次中存在失败项，已回滚'}
+    return [result if result is not None else {'name': pair[0], **done[pair]}
+            for pair, result in zip(renames, results)]
+
+def bulk_delete(folder: str, names: List[str], atomic: bool = False, background: bool = False) -> List[Dict[str, Any]]:
+    """批量删除；原子模式下先全部原子移入暂存目录，全部成功后交后台清除，否则移回原处；background时逐项移入回收站后台删除"""
+    checks = []
+    for name in names:
+        if not is_safe_name(name):
+            checks.append((name, f'无效的文件名: {name}'))
+        elif not os.path.lexists(os.path.join(folder, name)):
+            checks.append((name, f'文件 {name} 不存在'))
+        else:
+            checks.append((name, None))
+    results, failed = _precheck(checks, atomic)
+    if atomic and failed:
+        return results
+
+    pending = [name for name, result in zip(names, results) if result is None]
+    if not atomic:
+        def delete(name):
+            if background:
+                task = get_trash_reaper().move_to_trash(folder, name)
+                return {'success': True, 'task_id': task.id}
+            remove_path(os.path.join(folder, name))
+            return {'success': True}
+        done = dict(zip(pending, _run_parallel(pending, delete)))
+    else:
+        # 先登记回收站根目录，之后的恢复扫描不会把本批暂存目录再提交一次
+        reaper = get_trash_reaper()
+        reaper.recover(staging_dir_for(folder))
+        staging = os.path.join(staging_dir_for(folder), uuid.uuid4().hex)
+        os.makedirs(staging)
+
+        def stage(name):
+            os.rename(os.path.join(folder, name), os.path.join(staging, name))
+            return {'success': True}
+
+        done = dict(zip(pending, _run_parallel(pending, stage)))
+        if not all(r['success'] for r in done.values()):
+            for name, result in done.items():
+                if result['success']:
+                    os.rename(os.path.join(staging, name), os.path.join(folder, name))
+                    done[name] = {'success': False, 'error': '批次中存在失败项，已回滚'}
+        # 暂存目录交给后台清理器删除
+        reaper.submit(staging, f'bulk:{len(pending)}')
+    return [result if result is not None else {'name': name, **done[name]}
+            for name, result in zip(names, results)]
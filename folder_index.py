@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件夹监控索引
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import stat
+import struct
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, List, Any, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 配置文件列表 / 未挂载的配置文件列表
+TARGET_FOLDER = '/root/server/MCSM_Change/my_services/model_test/test_cfg'
+SOURCE_FOLDER = '/root/server/MCSM_Change/my_services/Reports_mixed/output'
+
+# inotify 事件掩码
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+def _load_inotify():
+    """加载libc中的inotify接口，非Linux或加载失败时返回None"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+class FileRecord(NamedTuple):
+    """紧凑的文件条目记录"""
+    name: str
+    type: str
+    size: int
+    mtime: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为接口返回格式"""
+        if self.type == 'directory':
+            return {'name': self.name, 'size': 0, 'modified': '', 'type': 'directory'}
+        return {
+            'name': self.name,
+            'size': self.size,
+            'modified': datetime.fromtimestamp(self.mtime).strftime('%m-%d %H:%M:%S'),
+            'mtime': self.mtime,
+            'type': 'file'
+        }
+
+def scan_folder(path: str) -> Dict[str, FileRecord]:
+    """用os.scandir扫描文件夹：类型取自DirEntry缓存，普通文件只stat一次"""
+    records = {}
+    try:
+        it = os.scandir(path)
+    except FileNotFoundError:
+        return records
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir():
+                    records[entry.name] = FileRecord(entry.name, 'directory', 0, 0.0)
+                elif entry.is_file():
+                    st = entry.stat()
+                    records[entry.name] = FileRecord(entry.name, 'file', st.st_size, st.st_mtime)
+            except OSError:
+                continue
+    return records
+
+def stat_entry(path: str, name: str) -> Optional[FileRecord]:
+    """单个条目只做一次stat，不存在或非文件/目录时返回None"""
+    try:
+        st = os.stat(os.path.join(path, name))
+    except OSError:
+        return None
+    if stat.S_ISREG(st.st_mode):
+        return FileRecord(name, 'file', st.st_size, st.st_mtime)
+    if stat.S_ISDIR(st.st_mode):
+        return FileRecord(name, 'directory', 0, 0.0)
+    return None
+
+# 支持的排序字段
+SORT_KEYS = {
+    'name': lambda record: record.name,
+    'mtime': lambda record: record.mtime,
+    'size': lambda record: record.size
+}
+
+def match_name(name: str, pattern: str) -> bool:
+    """含通配符时按glob匹配，否则按前缀匹配"""
+    if any(ch in pattern for ch in '*?['):
+        return fnmatch.fnmatchcase(name, pattern)
+    return name.startswith(pattern)
+
+class ChangeLog:
+    """有界的条目变更日志，按单调递增的版本号记录(文件夹, 文件名)"""
+
+    def __init__(self, max_entries: int = 10000):
+        # 进程实例ID：服务重启或换到其他worker后旧令牌失效，客户端需全量刷新
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.last_changed = time.time()
+        self._changes = deque(maxlen=max_entries)
+        self._cond = threading.Condition()
+
+    def record(self, key: str, names: List[str]):
+        with self._cond:
+            for name in names:
+                self.version += 1
+                self._changes.append((self.version, key, name))
+            if names:
+                self.last_changed = time.time()
+            self._cond.notify_all()
+
+    def token(self) -> str:
+        with self._cond:
+            return f"{self.instance_id}:{self.version}"
+
+    def parse_token(self, token: str) -> Optional[int]:
+        """解析版本令牌，不属于当前实例或格式无效时返回None"""
+        instance_id, _, version = (token or '').partition(':')
+        if instance_id != self.instance_id or not version.isdigit():
+            return None
+        return int(version)
+
+    def wait(self, version: int, timeout: float) -> bool:
+        """等待版本号超过version，返回是否有新变更"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.version > version, timeout)
+
+    def changed_since(self, version: int) -> Tuple[int, Optional[Dict[str, set]]]:
+        """返回(当前版本, {文件夹: 变更文件名集合})；日志已截断无法覆盖时返回None"""
+        with self._cond:
+            if version > self.version:
+                return self.version, None
+            if version < self.version and (not self._changes or self._changes[0][0] > version + 1):
+                return self.version, None
+            changed: Dict[str, set] = {}
+            for change_version, key, name in reversed(self._changes):
+                if change_version <= version:
+                    break
+                changed.setdefault(key, set()).add(name)
+            return self.version, changed
+
+class FolderIndex:
+    """单个文件夹的内存索引，按条目增量更新"""
+
+    def __init__(self, path: str, on_change: Optional[Callable[[List[str]], None]] = None):
+        self.path = path
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._entries: Dict[str, FileRecord] = {}
+        self.generation = 0
+        self._listing: List[Dict[str, Any]] = []
+        self._listing_generation = -1
+        self._sorted: Dict[tuple, List[FileRecord]] = {}
+        self._sorted_generation = -1
+
+    def rescan(self):
+        """全量重建索引"""
+        entries = scan_folder(self.path)
+        with self._lock:
+            if entries == self._entries:
+                return
+            old_entries = self._entries
+            self._entries = entries
+            self.generation += 1
+        changed = [name for name in old_entries.keys() | entries.keys()
+                   if old_entries.get(name) != entries.get(name)]
+        if self.on_change is not None:
+            self.on_change(changed)
+
+    def refresh_entry(self, name: str):
+        """重新检查单个条目（新增、修改或删除）"""
+        record = stat_entry(self.path, name)
+        with self._lock:
+            if record is None:
+                if self._entries.pop(name, None) is None:
+                    return
+            elif self._entries.get(name) == record:
+                return
+            else:
+                self._entries[name] = record
+            self.generation += 1
+        if self.on_change is not None:
+            self.on_change([name])
+
+    def get(self, name: str) -> Optional[FileRecord]:
+        with self._lock:
+            return self._entries.get(name)
+
+    def names(self, pattern: str = None) -> List[str]:
+        """索引中的文件名，可按前缀或glob过滤"""
+        with self._lock:
+            names = list(self._entries)
+        if pattern:
+            names = [name for name in names if match_name(name, pattern)]
+        return names
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def files(self) -> List[Dict[str, Any]]:
+        """返回当前条目列表，索引未变化时直接复用上次结果"""
+        with self._lock:
+            if self._listing_generation != self.generation:
+                self._listing = [record.to_dict() for record in self._entries.values()]
+                self._listing_generation = self.generation
+            return self._listing
+
+    def _sorted_records(self, sort_by: Optional[str], descending: bool) -> List[FileRecord]:
+        """按字段排序的记录列表，每个索引版本每种排序只计算一次"""
+        with self._lock:
+            if self._sorted_generation != self.generation:
+                self._sorted = {}
+                self._sorted_generation = self.generation
+            key = (sort_by, descending)
+            records = self._sorted.get(key)
+            if records is None:
+                records = list(self._entries.values())
+                if sort_by is not None:
+                    records.sort(key=SORT_KEYS[sort_by], reverse=descending)
+                elif descending:
+                    records.reverse()
+                self._sorted[key] = records
+            return records
+
+    def query(self, pattern: str = None, sort_by: str = None, descending: bool = False,
+              offset: int = 0, limit: int = None) -> Dict[str, Any]:
+        """过滤、排序并分页，返回匹配总数与当前页条目"""
+        records = self._sorted_records(sort_by, descending)
+        if pattern:
+            records = [record for record in records if match_name(record.name, pattern)]
+        end = None if limit is None else offset + limit
+        return {
+            'total': len(records),
+            'files': [record.to_dict() for record in records[offset:end]]
+        }
+
+class FolderMonitor:
+    """维护多个文件夹索引，由inotify增量更新，并定期全量重扫作为兜底"""
+
+    def __init__(self, folders: Dict[str, str], rescan_interval: float = 30.0):
+        self.changes = ChangeLog()
+        self.indexes = {
+            key: FolderIndex(path, on_change=lambda names, key=key: self.changes.record(key, names))
+            for key, path in folders.items()
+        }
+        self.rescan_interval = rescan_interval
+        self._libc = _load_inotify()
+        self._inotify_fd = -1
+        self._watches: Dict[int, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> 'FolderMonitor':
+        """首次全量扫描并启动监听线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            for index in self.indexes.values():
+                index.rescan()
+            if self._libc is not None:
+                fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+                if fd >= 0:
+                    self._inotify_fd = fd
+                    self._add_watches()
+                else:
+                    logger.warning("⚠️ inotify不可用，仅使用定期重扫")
+            self._thread = threading.Thread(target=self._run, name="folder-monitor", daemon=True)
+            self._thread.start()
+        return self
+
+    def _add_watches(self):
+        """为尚未监听的文件夹添加inotify监听（文件夹创建后在重扫时补上）"""
+        if self._inotify_fd < 0:
+            return
+        watched = set(self._watches.values())
+        for key, index in self.indexes.items():
+            if key in watched or not os.path.isdir(index.path):
+                continue
+            wd = self._libc.inotify_add_watch(self._inotify_fd, os.fsencode(index.path), WATCH_MASK)
+            if wd >= 0:
+                self._watches[wd] = key
+
+    def _run(self):
+        next_rescan = time.monotonic() + self.rescan_interval
+        while True:
+            timeout = max(next_rescan - time.monotonic(), 0)
+            if self._inotify_fd >= 0:
+                try:
+                    readable, _, _ = select.select([self._inotify_fd], [], [], timeout)
+                    if readable:
+                        self._handle_events(os.read(self._inotify_fd, 65536))
+                except OSError as e:
+                    logger.warning(f"⚠️ 读取inotify事件失败: {e}")
+                    time.sleep(timeout)
+            else:
+                time.sleep(timeout)
+            if time.monotonic() >= next_rescan:
+                self.rescan()
+                next_rescan = time.monotonic() + self.rescan_interval
+
+    def _handle_events(self, data: bytes):
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.rescan()
+                return
+            key = self._watches.get(wd)
+            if key is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                # 被监听的文件夹本身消失，移除监听并全量重扫
+                self._watches.pop(wd, None)
+                self.indexes[key].rescan()
+            elif name:
+                self.indexes[key].refresh_entry(os.fsdecode(name))
+
+    def rescan(self):
+        """全量重扫所有文件夹"""
+        for index in self.indexes.values():
+            index.rescan()
+        self._add_watches()
+
+    def refresh(self, key: str, name: str):
+        """文件操作后立即更新对应条目，不依赖inotify事件到达"""
+        index = self.indexes.get(key)
+        if index is not None:
+            index.refresh_entry(name)
+
+    def files(self, key: str) -> List[Dict[str, Any]]:
+        return self.indexes[key].files()
+
+    def query(self, key: str, **kwargs) -> Dict[str, Any]:
+        return self.indexes[key].query(**kwargs)
+
+    def names(self, key: str, pattern: str = None) -> List[str]:
+        return self.indexes[key].names(pattern)
+
+    def version_token(self) -> str:
+        """当前索引版本令牌，用于增量获取变更"""
+        return self.changes.token()
+
+    def changes_since(self, token: str, wait: float = 0) -> Dict[str, Any]:
+        """返回令牌之后新增/修改(upserted)与删除(removed)的条目；令牌失效时reset为True，需全量刷新"""
+        version = self.changes.parse_token(token)
+        if version is not None and wait > 0:
+            self.changes.wait(version, wait)
+        current, changed = self.changes.changed_since(version) if version is not None else (None, None)
+        result = {
+            'reset': changed is None,
+            'changes': {},
+            'totals': {key: len(index) for key, index in self.indexes.items()}
+        }
+        for key, index in self.indexes.items():
+            upserted, removed = [], []
+            for name in sorted((changed or {}).get(key, ())):
+                record = index.get(name)
+                if record is None:
+                    removed.append(name)
+                else:
+                    upserted.append(record.to_dict())
+            result['changes'][key] = {'upserted': upserted, 'removed': removed}
+        result['version'] = self.version_token() if current is None else f"{self.changes.instance_id}:{current}"
+        return result
+
+_folder_monitor: Optional[FolderMonitor] = None
+_folder_monitor_lock = threading.Lock()
+
+def get_folder_monitor() -> FolderMonitor:
+    """获取进程内共享的文件夹监控索引"""
+    global _folder_monitor
+    with _folder_monitor_lock:
+        if _folder_monitor is None:
+            _folder_monitor = FolderMonitor({'target': TARGET_FOLDER, 'source': SOURCE_FOLDER})
+        return _folder_monitor.start()
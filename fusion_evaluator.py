@@ -7,14 +7,28 @@
 import asyncio
 import json
 import logging
+import math
 import time
 import psutil
 import hashlib
 import os
+import threading
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from urllib.parse import urlsplit
+from typing import Awaitable, Callable, Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
 
+from output_format import DECODE_ERRORS, DEFAULT_OUTPUT_FORMAT, output_extension, read_document, resolve_output_format, write_document
+from report_store import get_report_store
+from similarity import SimilarityIndex, jaccard_similarity, record_tokens
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 try:
     import nest_asyncio
     nest_asyncio.apply()
@@ -39,6 +53,263 @@ def ensure_output_directory():
         logger.info(f"✅ 创建输出目录: {output_dir}")
     return output_dir
 
+# psutil.net_connections(kind='inet') 覆盖的套接字表
+PROC_NET_TABLES = ('/proc/net/tcp', '/proc/net/tcp6', '/proc/net/udp', '/proc/net/udp6')
+
+def _count_table_rows(path: str, chunk_size: int = 65536) -> int:
+    """按块流式统计/proc表的数据行数（扣除表头）"""
+    lines = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            lines += chunk.count(b'\n')
+    return max(lines - 1, 0)
+
+def count_network_connections() -> int:
+    """统计网络连接数，优先流式读取/proc/net，不可用时回退psutil"""
+    total = 0
+    readable = False
+    for path in PROC_NET_TABLES:
+        try:
+            total += _count_table_rows(path)
+            readable = True
+        except OSError:
+            continue
+    if readable:
+        return total
+    return len(psutil.net_connections())
+
+def count_processes() -> int:
+    """统计进程数，优先遍历/proc目录项，不可用时回退psutil"""
+    try:
+        with os.scandir('/proc') as it:
+            return sum(1 for entry in it if entry.name.isdigit())
+    except OSError:
+        return len(psutil.pids())
+
+class SystemMetricsSampler:
+    """后台系统指标采样器，维护CPU/内存/进程数/连接数的滚动快照"""
+
+    def __init__(self, interval: float = 1.0, warmup: float = 0.1, count_mode: str = "procfs"):
+        self.interval = interval
+        self.warmup = warmup
+        # 计数模式: procfs 流式计数（失败时自动回退psutil）/ psutil 完整枚举
+        self.count_mode = count_mode
+        self._lock = threading.Lock()
+        self._snapshot: Dict[str, Any] = {}
+        self._ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'SystemMetricsSampler':
+        """启动采样线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """停止采样线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _run(self):
+        # 首次调用cpu_percent(interval=None)只建立基准，短暂预热后再取第一份快照
+        psutil.cpu_percent(interval=None)
+        self._stop_event.wait(self.warmup)
+        while not self._stop_event.is_set():
+            try:
+                self._sample()
+            except Exception as e:
+                logger.warning(f"⚠️ 系统指标采样失败: {e}")
+            self._stop_event.wait(self.interval)
+
+    def _sample(self):
+        if self.count_mode == "psutil":
+            processes = len(psutil.pids())
+            connections = len(psutil.net_connections())
+        else:
+            processes = count_processes()
+            connections = count_network_connections()
+        snapshot = {
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': psutil.virtual_memory().percent,
+            'processes': processes,
+            'connections': connections,
+            'sampled_at': time.time()
+        }
+        with self._lock:
+            self._snapshot = snapshot
+        self._ready.set()
+
+    def get_snapshot(self, timeout: float = 2.0) -> Dict[str, Any]:
+        """获取最新快照，仅在尚无任何采样结果时最多等待timeout秒"""
+        if not self._ready.is_set():
+            self.start()
+            self._ready.wait(timeout)
+        with self._lock:
+            return dict(self._snapshot)
+
+_metrics_sampler: Optional[SystemMetricsSampler] = None
+_metrics_sampler_lock = threading.Lock()
+
+def get_metrics_sampler() -> SystemMetricsSampler:
+    """获取进程内共享的系统指标采样器"""
+    global _metrics_sampler
+    with _metrics_sampler_lock:
+        if _metrics_sampler is None:
+            _metrics_sampler = SystemMetricsSampler()
+        return _metrics_sampler.start()
+
+# 权重数据文件，由Web端写入、评估器读取
+WEIGHTS_STORE_PATH = "/root/server/MCSM_Change/my_services/Reports_mixed/weights.json"
+
+class WeightStore:
+    """维度权重存储：内存读写，落盘采用临时文件+fsync+rename的原子替换"""
+
+    def __init__(self, path: str = WEIGHTS_STORE_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._weights: Dict[str, float] = {}
+        self._file_key = ()
+
+    def _current_file_key(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _refresh(self):
+        """文件被其他进程替换时重新读取（调用方需持有锁）"""
+        key = self._current_file_key()
+        if key == self._file_key:
+            return
+        weights = {}
+        if key is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                weights = {dim: float(value) for dim, value in data.get('weights', {}).items()}
+            except (OSError, ValueError, AttributeError) as e:
+                logger.error(f"❌ 权重文件读取失败: {e}")
+                return
+        self._weights = weights
+        self._file_key = key
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程写锁，避免多个Web worker并发写入时相互覆盖"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, weights: Dict[str, float]):
+        directory = os.path.dirname(self.path) or '.'
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        payload = {
+            'weights': weights,
+            'updated_timestamp': datetime.now().isoformat()
+        }
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def get(self, dimension: str) -> Optional[float]:
+        """获取维度权重，未存储时返回None"""
+        with self._lock:
+            self._refresh()
+            return self._weights.get(dimension)
+
+    def get_all(self) -> Dict[str, float]:
+        """获取全部已存储权重"""
+        with self._lock:
+            self._refresh()
+            return dict(self._weights)
+
+    def version(self) -> Dict[str, Any]:
+        """权重内容哈希与文件修改时间，用于条件请求"""
+        with self._lock:
+            self._refresh()
+            payload = json.dumps(self._weights, sort_keys=True)
+            return {
+                'hash': hashlib.sha1(payload.encode()).hexdigest(),
+                'last_modified': self._file_key[0] / 1e9 if self._file_key else None
+            }
+
+    def update(self, weights: Dict[str, float]) -> Dict[str, float]:
+        """更新一个或多个维度权重并原子落盘，返回更新后的全部权重；权重须为非负有限数，否则抛出ValueError且不写入"""
+        validated = {}
+        for dim, value in weights.items():
+            weight = float(value)
+            # NaN/Infinity写入后/api/config会输出非法JSON
+            if weight < 0 or not math.isfinite(weight):
+                raise ValueError(f"维度 {dim} 的权重无效: {value}")
+            validated[dim] = weight
+        with self._lock, self._file_lock():
+            self._refresh()
+            new_weights = dict(self._weights)
+            new_weights.update(validated)
+            self._write(new_weights)
+            self._weights = new_weights
+            self._file_key = self._current_file_key()
+            return dict(new_weights)
+
+    def set(self, dimension: str, weight: float) -> Dict[str, float]:
+        """更新单个维度权重"""
+        return self.update({dimension: weight})
+
+_weight_store: Optional[WeightStore] = None
+_weight_store_lock = threading.Lock()
+
+def get_weight_store() -> WeightStore:
+    """获取进程内共享的权重存储"""
+    global _weight_store
+    with _weight_store_lock:
+        if _weight_store is None:
+            _weight_store = WeightStore()
+        return _weight_store
+
+# 输出目录保留策略默认值：默认关闭，0 表示不限制该项
+DEFAULT_RETENTION_POLICY = {
+    "enabled": False,
+    "keep_last": 200,
+    "max_age_days": 30,
+    "max_total_bytes": 0,
+    "compact_reports": True,
+    "interval_seconds": 600
+}
+
+# 多目标评估的默认并发设置（可在test_configuration中覆盖）
+DEFAULT_FANOUT_SETTINGS = {
+    "max_concurrency": 8,
+    "per_host_limit": 2
+}
+
+def target_host(target: str) -> str:
+    """目标地址中的主机名，用于按主机限流（支持 host:port 与 URL 形式）"""
+    parsed = urlsplit(target if '://' in target else f'//{target}')
+    return parsed.hostname or target
+
 @dataclass
 class EvaluationResult:
     dimension: str
@@ -49,6 +320,34 @@ class EvaluationResult:
     details: Dict[str, Any]
     timestamp: str
 
+@dataclass
+class DimensionSpec:
+    name: str
+    evaluate: Callable[..., Awaitable[EvaluationResult]]
+    cost: float = 1.0
+    timeout: float = 30.0
+    concurrency: int = 8
+
+# 评估维度注册表（按注册顺序），由 register_dimension 装饰的评估方法填充
+DIMENSION_REGISTRY: Dict[str, DimensionSpec] = {}
+
+def register_dimension(name: str, cost: float = 1.0, timeout: float = 30.0, concurrency: int = 8):
+    """注册评估维度：cost为预估耗时（秒，调度时耗时长的先启动），timeout为单次评估期限，concurrency为该维度同时运行的评估数上限"""
+    def decorator(func):
+        DIMENSION_REGISTRY[name] = DimensionSpec(name, func, cost, timeout, concurrency)
+        return func
+    return decorator
+
+# 各事件循环中每个维度的并发信号量（asyncio信号量不能跨事件循环共享）
+_dimension_semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]' = weakref.WeakKeyDictionary()
+
+def get_dimension_semaphore(spec: DimensionSpec) -> asyncio.Semaphore:
+    """获取当前事件循环中该维度的并发信号量"""
+    semaphores = _dimension_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if spec.name not in semaphores:
+        semaphores[spec.name] = asyncio.Semaphore(spec.concurrency)
+    return semaphores[spec.name]
+
 class ConfigManager:
     def __init__(self, config_path: str = None):
         if config_path is None:
@@ -62,14 +361,15 @@ class ConfigManager:
     def load_config(self) -> Dict[str, Any]:
         """加载配置文件"""
         try:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            # 按内容识别格式（JSON/msgpack，可带gzip/zstd压缩）
+            config = read_document(self.config_path)
             self.validate_config(config)
             logger.info(f"✅ 配置文件加载成功: {self.config_path}")
             return config
         except FileNotFoundError:
             return self.get_default_config()
-        except json.JSONDecodeError as e:
+        except DECODE_ERRORS as e:
+            # 只处理内容无法解码的情况，validate_config的校验错误照常抛出
             logger.error(f"❌ 配置文件格式错误: {e}")
             return self.get_default_config()
     
@@ -102,28 +402,502 @@ class ConfigManager:
                 "target_url": "192.168.1.103:5011"
             },
             "output_settings": {
-                "generate_report": True
+                "generate_report": True,
+                "format": DEFAULT_OUTPUT_FORMAT["format"],
+                "compression": DEFAULT_OUTPUT_FORMAT["compression"],
+                "retention": dict(DEFAULT_RETENTION_POLICY)
             }
         }
     
     def get_weight(self, dimension: str) -> float:
-        """获取指定维度的权重"""
+        """获取指定维度的权重，权重存储中的值优先于配置文件"""
+        stored = get_weight_store().get(dimension)
+        if stored is not None:
+            return stored
         return self.config['evaluation_weights'].get(dimension, {}).get('weight', 0.0)
     
+    def get_weight_values(self, dimensions) -> Dict[str, float]:
+        """一次读取多个维度的权重，优先级同get_weight"""
+        stored = get_weight_store().get_all()
+        configured = self.config['evaluation_weights']
+        return {
+            dimension: stored[dimension] if dimension in stored else configured.get(dimension, {}).get('weight', 0.0)
+            for dimension in dimensions
+        }
+    
+    def get_weights(self) -> Dict[str, Dict[str, float]]:
+        """获取全部维度权重（合并配置文件与权重存储）"""
+        stored = get_weight_store().get_all()
+        weights = {}
+        for dimension, config_data in self.config['evaluation_weights'].items():
+            weights[dimension] = dict(config_data)
+            if dimension in stored:
+                weights[dimension]['weight'] = stored[dimension]
+        return weights
+    
     def get_target_url(self) -> str:
         """获取目标URL"""
         return self.config['test_configuration'].get('target_url', '192.168.1.103:5011')
+    
+    def get_targets(self) -> List[str]:
+        """
+        获取评估目标列表：test_configuration.targets（地址字符串或含url的对象），未配置时为单个target_url
+
+        targets为单个字符串时视为一个目标；其他非列表值或缺少url的条目抛出ValueError
+        """
+        targets = self.config['test_configuration'].get('targets') or [self.get_target_url()]
+        if isinstance(targets, str):
+            targets = [targets]
+        if not isinstance(targets, list):
+            raise ValueError(f"targets 必须是目标地址字符串或列表，当前为 {targets!r}")
+        urls = []
+        for target in targets:
+            url = target.get('url') if isinstance(target, dict) else target
+            if not isinstance(url, str) or not url:
+                raise ValueError(f"无效的评估目标 {target!r}：须为地址字符串或含url字段的对象")
+            urls.append(url)
+        return list(dict.fromkeys(urls))
+    
+    def get_fanout_settings(self) -> Dict[str, int]:
+        """获取多目标评估的全局并发上限与每主机并发上限"""
+        settings = dict(DEFAULT_FANOUT_SETTINGS)
+        configured = self.config['test_configuration']
+        for key, default in DEFAULT_FANOUT_SETTINGS.items():
+            if key not in configured:
+                continue
+            value = configured[key]
+            # 0会使信号量永远无法获取，整个评估挂起；非整数同样视为无效
+            if isinstance(value, int) and not isinstance(value, bool) and value >= 1:
+                settings[key] = value
+            else:
+                logger.warning(f"⚠️ {key} 须为不小于1的整数，当前为 {value!r}，使用默认值 {default}")
+        return settings
+    
+    def get_retention_policy(self) -> Dict[str, Any]:
+        """获取输出目录保留策略（未配置的项使用默认值）"""
+        policy = dict(DEFAULT_RETENTION_POLICY)
+        policy.update(self.config['output_settings'].get('retention', {}))
+        return policy
+    
+    def get_output_format(self) -> Tuple[str, str]:
+        """获取报告与测试配置的输出格式(format, compression)，配置无效时使用默认格式"""
+        try:
+            return resolve_output_format(self.config['output_settings'])
+        except ValueError as e:
+            logger.error(f"❌ 输出格式配置无效: {e}")
+            return DEFAULT_OUTPUT_FORMAT['format'], DEFAULT_OUTPUT_FORMAT['compression']
+
+class ConfigCache:
+    """进程内共享的配置缓存，仅在配置文件 mtime/size/inode 变化时重新加载"""
 
-class FusionEvaluator:
     def __init__(self, config_path: str = None):
-        self.config_manager = ConfigManager(config_path)
+        self.config_path = config_path
+        self._lock = threading.Lock()
+        self._manager: Optional[ConfigManager] = None
+        self._stat_key = None
+        self.loaded_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _file_key(self):
+        try:
+            st = os.stat(self.config_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def get_manager(self) -> ConfigManager:
+        """返回已解析并校验的ConfigManager，文件未变化时直接命中内存"""
+        with self._lock:
+            if self._manager is None:
+                # 首次加载时确定路径（并确保输出目录存在），之后不再重复检查目录
+                manager = ConfigManager(self.config_path)
+                self.config_path = manager.config_path
+                self._stat_key = self._file_key()
+                self._manager = manager
+                self.loaded_at = time.time()
+                self.misses += 1
+                return manager
+            key = self._file_key()
+            if key == self._stat_key:
+                self.hits += 1
+                return self._manager
+            self._manager = ConfigManager(self.config_path)
+            self._stat_key = key
+            self.loaded_at = time.time()
+            self.misses += 1
+            return self._manager
+
+    def invalidate(self):
+        """强制下次访问时重新加载"""
+        with self._lock:
+            self._stat_key = ()
+
+    def version(self) -> Dict[str, Any]:
+        """当前缓存对应的文件stat键与修改时间（文件不存在时取加载时间）"""
+        with self._lock:
+            key = self._stat_key
+            return {
+                'file_key': key,
+                'last_modified': key[0] / 1e9 if key else self.loaded_at
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中统计"""
+        with self._lock:
+            return {
+                'config_path': self.config_path,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+_config_cache = ConfigCache()
+
+def get_config_manager() -> ConfigManager:
+    """获取进程内共享的缓存ConfigManager"""
+    return _config_cache.get_manager()
+
+def get_config_version(refresh: bool = True) -> Dict[str, Any]:
+    """
+    配置内容版本（配置文件stat键 + 权重哈希）与最后修改时间，用于ETag/Last-Modified
+
+    调用方本次请求已通过get_config_manager取得配置时传refresh=False，避免重复检查文件并重复计入命中数
+    """
+    if refresh:
+        _config_cache.get_manager()
+    config_version = _config_cache.version()
+    weights_version = get_weight_store().version()
+    last_modified = max(t for t in (config_version['last_modified'], weights_version['last_modified']) if t is not None)
+    tag_source = repr((config_version['file_key'], weights_version['hash']))
+    return {
+        'etag': hashlib.sha1(tag_source.encode()).hexdigest(),
+        'last_modified': last_modified
+    }
+
+def get_config_cache_stats() -> Dict[str, Any]:
+    """获取配置缓存命中/未命中计数"""
+    return _config_cache.stats()
+
+def build_test_configuration_template() -> Dict[str, Any]:
+    """
+    测试配置模板：值为None的字段在生成时补入
+
+    每次调用都由字面量重新构建（比深拷贝快得多），调用方可以任意修改返回值而不影响其他配置
+    """
+    return {
+        "test_configuration": {
+            "metadata": {
+                "config_version": "1.0",
+                "created_timestamp": None,
+                "description": "模型评估测试配置文件"
+            },
+            "evaluation_dimensions": {
+                "privacy": {
+                    "weight": None,
+                    "enabled": True,
+                    "sub_tests": {
+                        "data_encryption": {
+                            "weight": 0.3,
+                            "description": "数据加密强度测试",
+                            "test_parameters": {
+                                "encryption_algorithms": ["AES-256", "RSA-2048"],
+                                "key_rotation_interval": "30d",
+                                "min_encryption_strength": 256
+                            }
+                        },
+                        "data_masking": {
+                            "weight": 0.25,
+                            "description": "数据脱敏效果测试",
+                            "test_parameters": {
+                                "masking_methods": ["tokenization", "pseudonymization"],
+                                "sensitive_fields": ["email", "phone", "id_number"],
+                                "masking_ratio": 0.8
+                            }
+                        },
+                        "access_control": {
+                            "weight": 0.2,
+                            "description": "访问控制机制测试",
+                            "test_parameters": {
+                                "authentication_methods": ["OAuth2", "JWT"],
+                                "session_timeout": 3600,
+                                "max_failed_attempts": 3
+                            }
+                        },
+                        "data_lifecycle": {
+                            "weight": 0.15,
+                            "description": "数据生命周期管理测试",
+                            "test_parameters": {
+                                "retention_period": "7y",
+                                "deletion_methods": ["secure_wipe", "cryptographic_erasure"],
+                                "backup_encryption": True
+                            }
+                        },
+                        "privacy_compliance": {
+                            "weight": 0.1,
+                            "description": "隐私法规合规性测试",
+                            "test_parameters": {
+                                "regulations": ["GDPR", "CCPA", "PIPL"],
+                                "consent_management": True,
+                                "data_portability": True
+                            }
+                        }
+                    }
+                },
+                "functionality": {
+                    "weight": None,
+                    "enabled": True,
+                    "sub_tests": {
+                        "robustness": {
+                            "weight": 0.35,
+                            "description": "系统鲁棒性测试",
+                            "test_parameters": {
+                                "error_injection_rate": 0.1,
+                                "fault_tolerance_threshold": 0.95,
+                                "recovery_time_limit": 30
+                            }
+                        },
+                        "accuracy": {
+                            "weight": 0.3,
+                            "description": "功能准确性测试",
+                            "test_parameters": {
+                                "test_dataset_size": 1000,
+                                "accuracy_threshold": 0.9,
+                                "cross_validation_folds": 5
+                            }
+                        },
+                        "response_quality": {
+                            "weight": 0.2,
+                            "description": "响应质量测试",
+                            "test_parameters": {
+                                "quality_metrics": ["relevance", "coherence", "completeness"],
+                                "human_evaluation_samples": 100,
+                                "automated_scoring": True
+                            }
+                        },
+                        "compatibility": {
+                            "weight": 0.1,
+                            "description": "兼容性测试",
+                            "test_parameters": {
+                                "supported_formats": ["json", "xml", "csv"],
+                                "api_versions": ["v1", "v2"],
+                                "browser_compatibility": ["chrome", "firefox", "safari"]
+                            }
+                        },
+                        "usability": {
+                            "weight": 0.05,
+                            "description": "易用性测试",
+                            "test_parameters": {
+                                "user_task_completion_rate": 0.9,
+                                "average_task_time": 120,
+                                "user_satisfaction_score": 4.0
+                            }
+                        }
+                    }
+                },
+                "infrastructure": {
+                    "weight": None,
+                    "enabled": True,
+                    "sub_tests": {
+                        "system_stability": {
+                            "weight": 0.3,
+                            "description": "系统稳定性测试",
+                            "test_parameters": {
+                                "uptime_requirement": 0.999,
+                                "max_downtime_per_month": 43.2,
+                                "health_check_interval": 30
+                            }
+                        },
+                        "resource_management": {
+                            "weight": 0.25,
+                            "description": "资源管理效率测试",
+                            "test_parameters": {
+                                "cpu_utilization_threshold": 0.8,
+                                "memory_utilization_threshold": 0.85,
+                                "disk_space_threshold": 0.9
+                            }
+                        },
+                        "load_balancing": {
+                            "weight": 0.2,
+                            "description": "负载均衡测试",
+                            "test_parameters": {
+                                "max_requests_per_second": 1000,
+                                "load_distribution_algorithm": "round_robin",
+                                "health_check_enabled": True
+                            }
+                        },
+                        "cpu_performance": {
+                            "weight": 0.15,
+                            "description": "CPU性能测试",
+                            "test_parameters": {
+                                "benchmark_duration": 300,
+                                "cpu_stress_test": True,
+                                "current_cpu_usage": None
+                            }
+                        },
+                        "memory_efficiency": {
+                            "weight": 0.1,
+                            "description": "内存使用效率测试",
+                            "test_parameters": {
+                                "memory_leak_detection": True,
+                                "gc_optimization": True,
+                                "current_memory_usage": None
+                            }
+                        }
+                    }
+                },
+                "performance": {
+                    "weight": None,
+                    "enabled": True,
+                    "sub_tests": {
+                        "response_speed": {
+                            "weight": 0.3,
+                            "description": "响应速度测试",
+                            "test_parameters": {
+                                "max_response_time": 2000,
+                                "percentile_95_threshold": 1500,
+                                "concurrent_users": 100
+                            }
+                        },
+                        "resource_consumption": {
+                            "weight": 0.25,
+                            "description": "资源消耗测试",
+                            "test_parameters": {
+                                "max_cpu_usage": 0.8,
+                                "max_memory_usage": 0.85,
+                                "max_disk_io": 1000
+                            }
+                        },
+                        "throughput": {
+                            "weight": 0.2,
+                            "description": "吞吐量测试",
+                            "test_parameters": {
+                                "min_requests_per_second": 500,
+                                "test_duration": 600,
+                                "ramp_up_time": 60
+                            }
+                        },
+                        "concurrent_processing": {
+                            "weight": 0.15,
+                            "description": "并发处理能力测试",
+                            "test_parameters": {
+                                "max_concurrent_requests": 1000,
+                                "queue_size_limit": 10000,
+                                "timeout_threshold": 30
+                            }
+                        },
+                        "scalability": {
+                            "weight": 0.1,
+                            "description": "可扩展性测试",
+                            "test_parameters": {
+                                "auto_scaling_enabled": True,
+                                "min_instances": 2,
+                                "max_instances": 10
+                            }
+                        }
+                    }
+                },
+                "security": {
+                    "weight": None,
+                    "enabled": True,
+                    "sub_tests": {
+                        "infrastructure_security": {
+                            "weight": 0.25,
+                            "description": "基础设施安全测试",
+                            "test_parameters": {
+                                "vulnerability_scanning": True,
+                                "penetration_testing": True,
+                                "security_monitoring": {
+                                    "cpu_monitoring": True,
+                                    "memory_monitoring": True,
+                                    "current_cpu_usage": None,
+                                    "current_memory_usage": None
+                                }
+                            }
+                        },
+                        "data_security": {
+                            "weight": 0.25,
+                            "description": "数据安全测试",
+                            "test_parameters": {
+                                "data_integrity_check": True,
+                                "hash_verification": True,
+                                "encryption_at_rest": True,
+                                "encryption_in_transit": True,
+                                "sample_data_hash": None
+                            }
+                        },
+                        "model_algorithm_security": {
+                            "weight": 0.25,
+                            "description": "模型算法安全测试",
+                            "test_parameters": {
+                                "adversarial_testing": True,
+                                "input_validation": True,
+                                "output_sanitization": True,
+                                "model_poisoning_detection": True,
+                                "response_time_monitoring": True
+                            }
+                        },
+                        "application_system_security": {
+                            "weight": 0.25,
+                            "description": "应用系统安全测试",
+                            "test_parameters": {
+                                "authentication_testing": True,
+                                "authorization_testing": True,
+                                "session_management": True,
+                                "input_sanitization": True,
+                                "system_monitoring": {
+                                    "process_monitoring": True,
+                                    "network_monitoring": True,
+                                    "current_processes": None,
+                                    "current_connections": None
+                                }
+                            }
+                        }
+                    }
+                }
+            },
+            "test_execution_settings": {
+                "timeout_seconds": 30,
+                "retry_attempts": 3,
+                "parallel_execution": True,
+                "log_level": "INFO",
+                "report_format": "json"
+            },
+            "environment_requirements": {
+                "python_version": ">=3.8",
+                "required_packages": ["psutil", "hashlib", "asyncio", "json"],
+                "system_requirements": {
+                    "min_memory_gb": 4,
+                    "min_cpu_cores": 2,
+                    "min_disk_space_gb": 10
+                }
+            }
+        }
+    }
+
+# 只读参考（评分结构、维度列表）；生成测试配置请使用build_test_configuration_template()
+TEST_CONFIGURATION_TEMPLATE = build_test_configuration_template()
+TEST_CONFIGURATION_DIMENSIONS = tuple(TEST_CONFIGURATION_TEMPLATE["test_configuration"]["evaluation_dimensions"])
+
+class FusionEvaluator:
+    def __init__(self, config_path: str = None, log_callback: Optional[Callable[[str, str], None]] = None,
+                 target: str = None, config_manager: ConfigManager = None):
+        self.config_manager = config_manager or ConfigManager(config_path)
+        # 可选日志回调(level, message)，供任务队列转发评估进度
+        self.log_callback = log_callback
+        # 评估目标，多目标评估时每个目标一个实例；未指定时取配置中的第一个目标（targets优先于target_url）
+        self.target = target or self.config_manager.get_targets()[0]
+        self.log_prefix = f"[{target}] " if target else ""
+        # 提前启动共享采样器，各维度评估时直接读取快照
+        self.metrics_sampler = get_metrics_sampler()
         self.results: List[EvaluationResult] = []
+        # 各维度的运行状态(ok/timeout/error)与耗时
+        self.dimension_status: Dict[str, Dict[str, Any]] = {}
         self.start_time = None
         self.end_time = None
     
     def log(self, message: str, level: str = "info"):
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        formatted_message = f"[{timestamp}] {message}"
+        formatted_message = f"[{timestamp}] {self.log_prefix}{message}"
         
         if level.lower() == "error":
             logger.error(formatted_message)
@@ -131,13 +905,18 @@ class FusionEvaluator:
             logger.warning(formatted_message)
         else:
             logger.info(formatted_message)
+        
+        if self.log_callback is not None:
+            self.log_callback(level.lower(), formatted_message)
 
     
     #### 安全维度检查
     def security_dimension_check(self):
         
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
+        # 从共享采样器读取快照，不在事件循环中阻塞采样
+        metrics = self.metrics_sampler.get_snapshot()
+        cpu_percent = metrics.get('cpu_percent', 0.0)
+        memory_percent = metrics.get('memory_percent', 0.0)
         
         data_sample = "sensitive_user_data_12345"
         data_hash = hashlib.sha256(data_sample.encode()).hexdigest()
@@ -145,24 +924,35 @@ class FusionEvaluator:
         model_input = "test prompt for model safety"
         model_response_time = time.time()
         
-        system_processes = len(psutil.pids())
-        network_connections = len(psutil.net_connections())
+        system_processes = metrics.get('processes', 0)
+        network_connections = metrics.get('connections', 0)
         
         return {
-            'infrastructure': {'cpu_percent': cpu_percent, 'memory_percent': memory.percent},
+            'infrastructure': {'cpu_percent': cpu_percent, 'memory_percent': memory_percent},
             'data_security': {'hash': data_hash[:16], 'encrypted': True},
             'model_algorithm': {'input_safe': True, 'response_time': model_response_time},
             'application_system': {'processes': system_processes, 'connections': network_connections}
         }
     
+    def calculate_similarity(self, item_a: Dict, item_b: Dict) -> float:
+        """两条记录的相似度：按"路径=值"展开后的Jaccard相似度"""
+        return jaccard_similarity(record_tokens(item_a), record_tokens(item_b))
+    
     def check_similarity_and_update(self, new_data: List[Dict], existing_data: List[Dict], threshold: float = 0.8) -> List[Dict]:
-        """相似度检查并更新数据"""
+        """相似度检查并更新数据：新记录替换第一条相似度超过阈值的已有记录"""
+        # MinHash/LSH索引筛出候选，只对候选计算精确相似度
+        index = SimilarityIndex(threshold)
+        for old_item in existing_data:
+            index.add(record_tokens(old_item))
         for new_item in new_data:
-            for j, old_item in enumerate(existing_data):
-                if self.calculate_similarity(new_item, old_item) > threshold:
-                    existing_data[j] = new_item; break
+            tokens = record_tokens(new_item)
+            j = index.find_first(tokens)
+            if j is not None:
+                existing_data[j] = new_item
+                index.replace(j, tokens)
         return existing_data
 
+    @register_dimension("privacy", cost=1.0)
     async def simulate_privacy_evaluation(self) -> EvaluationResult:
         self.log("开始隐私保护评估")
         await asyncio.sleep(1)
@@ -199,6 +989,7 @@ class FusionEvaluator:
         self.log(f"隐私评估完成，得分: {score:.2f}/{max_score}")
         return result
     
+    @register_dimension("functionality", cost=1.2)
     async def simulate_functionality_evaluation(self) -> EvaluationResult:
         self.log("开始功能性评估")
         await asyncio.sleep(1.2)
@@ -235,6 +1026,7 @@ class FusionEvaluator:
         self.log(f"功能性评估完成，得分: {score:.2f}/{max_score}")
         return result
     
+    @register_dimension("infrastructure", cost=0.8)
     async def simulate_infrastructure_evaluation(self) -> EvaluationResult:
         self.log("开始基础设施评估")
         await asyncio.sleep(0.8)
@@ -275,6 +1067,7 @@ class FusionEvaluator:
         self.log(f"基础设施评估完成，得分: {score:.2f}/{max_score}")
         return result
     
+    @register_dimension("performance", cost=1.5)
     async def simulate_performance_evaluation(self) -> EvaluationResult:
         self.log("开始性能评估")
         await asyncio.sleep(1.5)
@@ -317,6 +1110,7 @@ class FusionEvaluator:
         self.log(f"性能评估完成，得分: {score:.2f}/{max_score}")
         return result
     
+    @register_dimension("security", cost=1.3)
     async def simulate_security_evaluation(self) -> EvaluationResult:
         self.log("开始安全性评估")
         await asyncio.sleep(1.3)
@@ -380,19 +1174,48 @@ class FusionEvaluator:
         self.log(f"安全性评估完成，得分: {score:.2f}/{max_score}")
         return result
     
-    async def run_comprehensive_evaluation(self):
+    async def _run_dimension(self, spec: DimensionSpec, limiter: asyncio.Semaphore) -> Optional[EvaluationResult]:
+        """在全局与维度并发上限内运行单个维度，超时或异常只影响该维度"""
+        async with limiter, get_dimension_semaphore(spec):
+            started = time.time()
+            try:
+                result = await asyncio.wait_for(spec.evaluate(self), timeout=spec.timeout)
+                status = {'status': 'ok'}
+            except asyncio.TimeoutError:
+                result = None
+                status = {'status': 'timeout', 'error': f'超过 {spec.timeout} 秒未完成'}
+                self.log(f"维度 {spec.name} 评估超时（{spec.timeout}秒）", "error")
+            except Exception as e:
+                result = None
+                status = {'status': 'error', 'error': str(e)}
+                self.log(f"维度 {spec.name} 评估失败: {e}", "error")
+        status['duration'] = time.time() - started
+        self.dimension_status[spec.name] = status
+        return result
+    
+    async def run_comprehensive_evaluation(self, dimensions: List[str] = None, max_concurrency: int = None,
+                                           save_report: bool = True):
+        """
+        按注册表调度各维度评估：耗时长的先启动，受全局与维度并发上限约束，单个维度超时或失败时返回其余维度的结果
+
+        dimensions中含未注册的维度名时抛出ValueError，此时不运行任何维度
+        """
+        unknown = [name for name in (dimensions or ()) if name not in DIMENSION_REGISTRY]
+        if unknown:
+            raise ValueError(f"未注册的评估维度: {', '.join(unknown)}（可选: {', '.join(DIMENSION_REGISTRY)}）")
+        
         self.log("开始综合模型评估")
         self.start_time = time.time()
         
-        tasks = [
-            self.simulate_privacy_evaluation(),
-            self.simulate_functionality_evaluation(),
-            self.simulate_infrastructure_evaluation(),
-            self.simulate_performance_evaluation(),
-            self.simulate_security_evaluation()
-        ]
+        specs = [DIMENSION_REGISTRY[name] for name in (dimensions or DIMENSION_REGISTRY)]
+        limiter = asyncio.Semaphore(max_concurrency or len(specs) or 1)
+        self.dimension_status = {spec.name: {'status': 'pending'} for spec in specs}
         
-        self.results = await asyncio.gather(*tasks)
+        # 按预估耗时从长到短创建任务，全局并发受限时长任务先占用名额
+        tasks = {spec.name: asyncio.ensure_future(self._run_dimension(spec, limiter))
+                 for spec in sorted(specs, key=lambda spec: spec.cost, reverse=True)}
+        await asyncio.gather(*tasks.values())
+        self.results = [tasks[spec.name].result() for spec in specs if tasks[spec.name].result() is not None]
         self.end_time = time.time()
         
         total_weighted_score = sum(result.weighted_score for result in self.results)
@@ -401,12 +1224,84 @@ class FusionEvaluator:
         self.log(f"评估完成! 综合得分: {total_weighted_score:.2f}/{total_weight*100:.0f}")
         self.log(f"总耗时: {self.end_time - self.start_time:.2f}秒")
         
-        return self.generate_summary_report()
+        return self.generate_summary_report(save=save_report)
+    
+    async def run_multi_target_evaluation(self, targets: List[str] = None, max_concurrency: int = None,
+                                          per_host_limit: int = None) -> Dict[str, Any]:
+        """并发评估多个目标：在全局与每主机并发上限内逐目标运行综合评估，汇总为一份按目标索引的报告"""
+        settings = self.config_manager.get_fanout_settings()
+        targets = list(dict.fromkeys(targets or self.config_manager.get_targets()))
+        limiter = asyncio.Semaphore(max_concurrency or settings['max_concurrency'])
+        per_host_limit = per_host_limit or settings['per_host_limit']
+        host_limiters: Dict[str, asyncio.Semaphore] = {}
+        
+        self.log(f"开始多目标评估: {len(targets)} 个目标")
+        self.start_time = time.time()
+        
+        async def evaluate_target(target: str) -> Dict[str, Any]:
+            host_limiter = host_limiters.setdefault(target_host(target), asyncio.Semaphore(per_host_limit))
+            async with limiter, host_limiter:
+                try:
+                    evaluator = FusionEvaluator(log_callback=self.log_callback, target=target, config_manager=self.config_manager)
+                    return await evaluator.run_comprehensive_evaluation(save_report=False)
+                except Exception as e:
+                    self.log(f"目标 {target} 评估失败: {e}", "error")
+                    return {"error": str(e)}
+        
+        reports = await asyncio.gather(*(evaluate_target(target) for target in targets))
+        self.end_time = time.time()
+        self.log(f"多目标评估完成，总耗时: {self.end_time - self.start_time:.2f}秒")
+        
+        return self.generate_multi_target_report(dict(zip(targets, reports)))
+    
+    def generate_multi_target_report(self, reports: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """生成多目标汇总报告：各目标的完整报告按目标索引，并给出综合得分排名"""
+        output_dir = ensure_output_directory()
+        succeeded = {target: report for target, report in reports.items() if 'summary' in report}
+        ranking = sorted(succeeded, key=lambda target: succeeded[target]['summary']['overall_score'], reverse=True)
+        
+        report = {
+            "metadata": {
+                "report_type": "multi_target_evaluation_summary",
+                "generated_timestamp": datetime.now().isoformat(),
+                "evaluation_duration": self.end_time - self.start_time if self.end_time and self.start_time else 0,
+                "targets": list(reports)
+            },
+            "summary": {
+                "total_targets": len(reports),
+                "succeeded": len(succeeded),
+                "failed": len(reports) - len(succeeded),
+                "partial_targets": [target for target in ranking if succeeded[target]['summary'].get('partial')],
+                "average_overall_score": sum(succeeded[target]['summary']['overall_score'] for target in ranking) / len(ranking) if ranking else 0,
+                "best_target": ranking[0] if ranking else None,
+                "ranking": [
+                    {"target": target, "overall_score": succeeded[target]['summary']['overall_score']}
+                    for target in ranking
+                ]
+            },
+            "targets": reports
+        }
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        fmt, compression = self.config_manager.get_output_format()
+        report_filename = os.path.join(output_dir, f"evaluation_multi_report_{timestamp}{output_extension(fmt, compression)}")
+        write_document(report_filename, report, fmt, compression)
+        self.log(f"✅ 多目标评估报告已保存: {report_filename}")
+        
+        # 各目标报告分别入库，历史查询与单目标报告一致
+        try:
+            store = get_report_store()
+            for target in ranking:
+                store.add(succeeded[target], filename=f"{report_filename}#{target}")
+        except Exception as e:
+            self.log(f"报告入库失败: {e}", "error")
+        
+        return report
     
-    def generate_summary_report(self) -> Dict[str, Any]:
-        """生成评估总结报告"""
+    def generate_summary_report(self, save: bool = True) -> Dict[str, Any]:
+        """生成评估总结报告，save为False时只返回不落盘"""
         if not self.results:
-            return {"error": "没有评估结果"}
+            return {"error": "没有评估结果", "dimension_status": self.dimension_status}
         
         # 确保输出目录存在
         output_dir = ensure_output_directory()
@@ -416,14 +1311,17 @@ class FusionEvaluator:
             "metadata": {
                 "report_type": "model_evaluation_summary",
                 "generated_timestamp": datetime.now().isoformat(),
-                "evaluation_duration": self.end_time - self.start_time if self.end_time and self.start_time else 0
+                "evaluation_duration": self.end_time - self.start_time if self.end_time and self.start_time else 0,
+                "target": self.target
             },
             "summary": {
                 "total_dimensions": len(self.results),
                 "total_weighted_score": sum(result.weighted_score for result in self.results),
                 "total_weight": sum(result.weight for result in self.results),
-                "overall_score": sum(result.weighted_score for result in self.results) / sum(result.weight for result in self.results) if sum(result.weight for result in self.results) > 0 else 0
+                "overall_score": sum(result.weighted_score for result in self.results) / sum(result.weight for result in self.results) if sum(result.weight for result in self.results) > 0 else 0,
+                "partial": any(status['status'] != 'ok' for status in self.dimension_status.values())
             },
+            "dimension_status": self.dimension_status,
             "detailed_results": [
                 {
                     "dimension": result.dimension,
@@ -438,335 +1336,87 @@ class FusionEvaluator:
             ]
         }
         
+        if not save:
+            return report
+        
         # 保存报告到文件
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        report_filename = os.path.join(output_dir, f"evaluation_report_{timestamp}.json")
+        fmt, compression = self.config_manager.get_output_format()
+        report_filename = os.path.join(output_dir, f"evaluation_report_{timestamp}{output_extension(fmt, compression)}")
         
-        with open(report_filename, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        write_document(report_filename, report, fmt, compression)
         
         self.log(f"✅ 评估报告已保存: {report_filename}")
         
+        # 追加到报告存储，供历史查询使用
+        try:
+            report_id = get_report_store().add(report, filename=report_filename)
+            self.log(f"✅ 评估报告已入库: #{report_id}")
+        except Exception as e:
+            self.log(f"报告入库失败: {e}", "error")
+        
         return report
     
     def generate_test_configuration(self) -> Dict[str, Any]:
-        """生成测试配置文件"""
+        """生成测试配置：在新构建的模板上补入权重、时间戳与实时指标"""
         
-        # 获取实际系统信息用于配置参考
+        # 获取实际系统信息用于配置参考（读取采样器快照，不阻塞）
         security_data = self.security_dimension_check()
+        infrastructure = security_data['infrastructure']
+        application_system = security_data['application_system']
         
-        config = {
-            "test_configuration": {
-                "metadata": {
-                    "config_version": "1.0",
-                    "created_timestamp": datetime.now().isoformat(),
-                    "description": "模型评估测试配置文件"
-                },
-                "evaluation_dimensions": {
-                    "privacy": {
-                        "weight": self.config_manager.get_weight('privacy'),
-                        "enabled": True,
-                        "sub_tests": {
-                            "data_encryption": {
-                                "weight": 0.3,
-                                "description": "数据加密强度测试",
-                                "test_parameters": {
-                                    "encryption_algorithms": ["AES-256", "RSA-2048"],
-                                    "key_rotation_interval": "30d",
-                                    "min_encryption_strength": 256
-                                }
-                            },
-                            "data_masking": {
-                                "weight": 0.25,
-                                "description": "数据脱敏效果测试",
-                                "test_parameters": {
-                                    "masking_methods": ["tokenization", "pseudonymization"],
-                                    "sensitive_fields": ["email", "phone", "id_number"],
-                                    "masking_ratio": 0.8
-                                }
-                            },
-                            "access_control": {
-                                "weight": 0.2,
-                                "description": "访问控制机制测试",
-                                "test_parameters": {
-                                    "authentication_methods": ["OAuth2", "JWT"],
-                                    "session_timeout": 3600,
-                                    "max_failed_attempts": 3
-                                }
-                            },
-                            "data_lifecycle": {
-                                "weight": 0.15,
-                                "description": "数据生命周期管理测试",
-                                "test_parameters": {
-                                    "retention_period": "7y",
-                                    "deletion_methods": ["secure_wipe", "cryptographic_erasure"],
-                                    "backup_encryption": True
-                                }
-                            },
-                            "privacy_compliance": {
-                                "weight": 0.1,
-                                "description": "隐私法规合规性测试",
-                                "test_parameters": {
-                                    "regulations": ["GDPR", "CCPA", "PIPL"],
-                                    "consent_management": True,
-                                    "data_portability": True
-                                }
-                            }
-                        }
-                    },
-                    "functionality": {
-                        "weight": self.config_manager.get_weight('functionality'),
-                        "enabled": True,
-                        "sub_tests": {
-                            "robustness": {
-                                "weight": 0.35,
-                                "description": "系统鲁棒性测试",
-                                "test_parameters": {
-                                    "error_injection_rate": 0.1,
-                                    "fault_tolerance_threshold": 0.95,
-                                    "recovery_time_limit": 30
-                                }
-                            },
-                            "accuracy": {
-                                "weight": 0.3,
-                                "description": "功能准确性测试",
-                                "test_parameters": {
-                                    "test_dataset_size": 1000,
-                                    "accuracy_threshold": 0.9,
-                                    "cross_validation_folds": 5
-                                }
-                            },
-                            "response_quality": {
-                                "weight": 0.2,
-                                "description": "响应质量测试",
-                                "test_parameters": {
-                                    "quality_metrics": ["relevance", "coherence", "completeness"],
-                                    "human_evaluation_samples": 100,
-                                    "automated_scoring": True
-                                }
-                            },
-                            "compatibility": {
-                                "weight": 0.1,
-                                "description": "兼容性测试",
-                                "test_parameters": {
-                                    "supported_formats": ["json", "xml", "csv"],
-                                    "api_versions": ["v1", "v2"],
-                                    "browser_compatibility": ["chrome", "firefox", "safari"]
-                                }
-                            },
-                            "usability": {
-                                "weight": 0.05,
-                                "description": "易用性测试",
-                                "test_parameters": {
-                                    "user_task_completion_rate": 0.9,
-                                    "average_task_time": 120,
-                                    "user_satisfaction_score": 4.0
-                                }
-                            }
-                        }
-                    },
-                    "infrastructure": {
-                        "weight": self.config_manager.get_weight('infrastructure'),
-                        "enabled": True,
-                        "sub_tests": {
-                            "system_stability": {
-                                "weight": 0.3,
-                                "description": "系统稳定性测试",
-                                "test_parameters": {
-                                    "uptime_requirement": 0.999,
-                                    "max_downtime_per_month": 43.2,
-                                    "health_check_interval": 30
-                                }
-                            },
-                            "resource_management": {
-                                "weight": 0.25,
-                                "description": "资源管理效率测试",
-                                "test_parameters": {
-                                    "cpu_utilization_threshold": 0.8,
-                                    "memory_utilization_threshold": 0.85,
-                                    "disk_space_threshold": 0.9
-                                }
-                            },
-                            "load_balancing": {
-                                "weight": 0.2,
-                                "description": "负载均衡测试",
-                                "test_parameters": {
-                                    "max_requests_per_second": 1000,
-                                    "load_distribution_algorithm": "round_robin",
-                                    "health_check_enabled": True
-                                }
-                            },
-                            "cpu_performance": {
-                                "weight": 0.15,
-                                "description": "CPU性能测试",
-                                "test_parameters": {
-                                    "benchmark_duration": 300,
-                                    "cpu_stress_test": True,
-                                    "current_cpu_usage": security_data['infrastructure']['cpu_percent']
-                                }
-                            },
-                            "memory_efficiency": {
-                                "weight": 0.1,
-                                "description": "内存使用效率测试",
-                                "test_parameters": {
-                                    "memory_leak_detection": True,
-                                    "gc_optimization": True,
-                                    "current_memory_usage": security_data['infrastructure']['memory_percent']
-                                }
-                            }
-                        }
-                    },
-                    "performance": {
-                        "weight": self.config_manager.get_weight('performance'),
-                        "enabled": True,
-                        "sub_tests": {
-                            "response_speed": {
-                                "weight": 0.3,
-                                "description": "响应速度测试",
-                                "test_parameters": {
-                                    "max_response_time": 2000,
-                                    "percentile_95_threshold": 1500,
-                                    "concurrent_users": 100
-                                }
-                            },
-                            "resource_consumption": {
-                                "weight": 0.25,
-                                "description": "资源消耗测试",
-                                "test_parameters": {
-                                    "max_cpu_usage": 0.8,
-                                    "max_memory_usage": 0.85,
-                                    "max_disk_io": 1000
-                                }
-                            },
-                            "throughput": {
-                                "weight": 0.2,
-                                "description": "吞吐量测试",
-                                "test_parameters": {
-                                    "min_requests_per_second": 500,
-                                    "test_duration": 600,
-                                    "ramp_up_time": 60
-                                }
-                            },
-                            "concurrent_processing": {
-                                "weight": 0.15,
-                                "description": "并发处理能力测试",
-                                "test_parameters": {
-                                    "max_concurrent_requests": 1000,
-                                    "queue_size_limit": 10000,
-                                    "timeout_threshold": 30
-                                }
-                            },
-                            "scalability": {
-                                "weight": 0.1,
-                                "description": "可扩展性测试",
-                                "test_parameters": {
-                                    "auto_scaling_enabled": True,
-                                    "min_instances": 2,
-                                    "max_instances": 10
-                                }
-                            }
-                        }
-                    },
-                    "security": {
-                        "weight": self.config_manager.get_weight('security'),
-                        "enabled": True,
-                        "sub_tests": {
-                            "infrastructure_security": {
-                                "weight": 0.25,
-                                "description": "基础设施安全测试",
-                                "test_parameters": {
-                                    "vulnerability_scanning": True,
-                                    "penetration_testing": True,
-                                    "security_monitoring": {
-                                        "cpu_monitoring": True,
-                                        "memory_monitoring": True,
-                                        "current_cpu_usage": security_data['infrastructure']['cpu_percent'],
-                                        "current_memory_usage": security_data['infrastructure']['memory_percent']
-                                    }
-                                }
-                            },
-                            "data_security": {
-                                "weight": 0.25,
-                                "description": "数据安全测试",
-                                "test_parameters": {
-                                    "data_integrity_check": True,
-                                    "hash_verification": True,
-                                    "encryption_at_rest": True,
-                                    "encryption_in_transit": True,
-                                    "sample_data_hash": security_data['data_security']['hash']
-                                }
-                            },
-                            "model_algorithm_security": {
-                                "weight": 0.25,
-                                "description": "模型算法安全测试",
-                                "test_parameters": {
-                                    "adversarial_testing": True,
-                                    "input_validation": True,
-                                    "output_sanitization": True,
-                                    "model_poisoning_detection": True,
-                                    "response_time_monitoring": True
-                                }
-                            },
-                            "application_system_security": {
-                                "weight": 0.25,
-                                "description": "应用系统安全测试",
-                                "test_parameters": {
-                                    "authentication_testing": True,
-                                    "authorization_testing": True,
-                                    "session_management": True,
-                                    "input_sanitization": True,
-                                    "system_monitoring": {
-                                        "process_monitoring": True,
-                                        "network_monitoring": True,
-                                        "current_processes": security_data['application_system']['processes'],
-                                        "current_connections": security_data['application_system']['connections']
-                                    }
-                                }
-                            }
-                        }
-                    }
-                },
-                "test_execution_settings": {
-                    "timeout_seconds": 30,
-                    "retry_attempts": 3,
-                    "parallel_execution": True,
-                    "log_level": "INFO",
-                    "report_format": "json"
-                },
-                "environment_requirements": {
-                    "python_version": ">=3.8",
-                    "required_packages": ["psutil", "hashlib", "asyncio", "json"],
-                    "system_requirements": {
-                        "min_memory_gb": 4,
-                        "min_cpu_cores": 2,
-                        "min_disk_space_gb": 10
-                    }
-                }
-            }
-        }
+        weights = self.config_manager.get_weight_values(TEST_CONFIGURATION_DIMENSIONS)
+        
+        config = build_test_configuration_template()
+        test_configuration = config["test_configuration"]
+        test_configuration["metadata"]["created_timestamp"] = datetime.now().isoformat()
+        dimensions = test_configuration["evaluation_dimensions"]
+        for dimension, weight in weights.items():
+            dimensions[dimension]["weight"] = weight
+        
+        infrastructure_tests = dimensions["infrastructure"]["sub_tests"]
+        infrastructure_tests["cpu_performance"]["test_parameters"]["current_cpu_usage"] = infrastructure['cpu_percent']
+        infrastructure_tests["memory_efficiency"]["test_parameters"]["current_memory_usage"] = infrastructure['memory_percent']
+        
+        security_tests = dimensions["security"]["sub_tests"]
+        security_monitoring = security_tests["infrastructure_security"]["test_parameters"]["security_monitoring"]
+        security_monitoring["current_cpu_usage"] = infrastructure['cpu_percent']
+        security_monitoring["current_memory_usage"] = infrastructure['memory_percent']
+        security_tests["data_security"]["test_parameters"]["sample_data_hash"] = security_data['data_security']['hash']
+        system_monitoring = security_tests["application_system_security"]["test_parameters"]["system_monitoring"]
+        system_monitoring["current_processes"] = application_system['processes']
+        system_monitoring["current_connections"] = application_system['connections']
         
         return config
 
-if __name__ == "__main__":
+def save_test_configuration(evaluator: FusionEvaluator = None) -> Dict[str, Any]:
+    """生成测试配置并保存到输出目录，返回文件路径与配置内容"""
     # 确保输出目录存在
     output_dir = ensure_output_directory()
     
-    evaluator = FusionEvaluator()
+    if evaluator is None:
+        evaluator = FusionEvaluator()
     
     # 生成测试配置文件
     config = evaluator.generate_test_configuration()
     
     # 生成带时间戳的文件名
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = os.path.join(output_dir, f"config_{timestamp}.json")
+    fmt, compression = evaluator.config_manager.get_output_format()
+    filename = os.path.join(output_dir, f"config_{timestamp}{output_extension(fmt, compression)}")
     
-    # 保存测试配置到JSON文件
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(config, f, ensure_ascii=False, indent=2)
+    # 按output_settings中的格式保存测试配置
+    write_document(filename, config, fmt, compression)
+    
+    return {'filename': filename, 'config': config}
+
+if __name__ == "__main__":
+    result = save_test_configuration()
+    config = result['config']
     
-    print(f"测试配置文件已生成: {filename}")
+    print(f"测试配置文件已生成: {result['filename']}")
     print(f"配置版本: {config['test_configuration']['metadata']['config_version']}")
     print("\n评估维度配置:")
     for dimension, data in config['test_configuration']['evaluation_dimensions'].items():
         sub_tests_count = len(data['sub_tests'])
-        print(f"  {dimension}: 权重 {data['weight']}, 子测试项 {sub_tests_count}个")
\ No newline at end of file
+        print(f"  {dimension}: 权重 {data['weight']}, 子测试项 {sub_tests_count}个")
@@ -4,19 +4,42 @@
 配置权重监控Web应用
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
+import hashlib
 import json
+import math
 import os
-from datetime import datetime
-from fusion_evaluator import ConfigManager
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime, timezone
+from typing import Any, Dict
+from evaluator_runner import get_evaluator_runner, get_job_queue
+from file_ops import transfer_path, bulk_transfer, bulk_rename, bulk_delete, get_trash_reaper, staging_dir_for
+from folder_index import TARGET_FOLDER, SOURCE_FOLDER, SORT_KEYS, get_folder_monitor
+from fusion_evaluator import ConfigManager, get_config_manager, get_config_cache_stats, get_config_version, get_weight_store
+from report_store import OVERALL_METRIC, choose_bucket, get_report_store
+from retention import get_retention_manager
+from scoring import get_scoring_schema, score_batch, grid_weight_vectors, random_weight_vectors, sweep_weights
 
 app = Flask(__name__)
 
-def get_config_data():
-    """获取配置数据"""
+# 监控页面每页条目数
+MONITOR_PAGE_SIZE = 200
+# 增量变更长轮询的最长等待秒数
+MONITOR_MAX_WAIT = 30
+# 报告查询单次最多返回条数
+REPORTS_MAX_LIMIT = 1000
+# 历史曲线默认时间范围（秒）与最大点数
+HISTORY_DEFAULT_RANGE = 7 * 86400
+HISTORY_MAX_POINTS = 2000
+
+def get_config_data(version: Dict[str, Any] = None, config_manager: ConfigManager = None):
+    """获取配置数据，last_updated为配置/权重的最后修改时间"""
     try:
-        config_manager = ConfigManager()
-        config = config_manager.config
+        # 使用进程内缓存，配置文件未变化时不访问磁盘
+        if config_manager is None:
+            config_manager = get_config_manager()
+        if version is None:
+            version = get_config_version(refresh=False)
         
         # 维度中文翻译映射
         dimension_translations = {
@@ -27,8 +50,8 @@ def get_config_data():
             'security': '安全性'
         }
         
-        # 提取权重数据
-        weights = config.get('evaluation_weights', {})
+        # 提取权重数据（权重存储优先于配置文件）
+        weights = config_manager.get_weights()
         
         # 转换为ECharts格式，使用中文名称
         pie_data = []
@@ -45,84 +68,138 @@ def get_config_data():
             'weights': weights,
             'pie_data': pie_data,
             'total_weight': sum(item['value'] for item in pie_data),
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'last_updated': datetime.fromtimestamp(version['last_modified']).strftime('%Y-%m-%d %H:%M:%S')
         }
     except Exception as e:
-        return {
-            'error': str(e),
-            'weights': {},
-            'pie_data': [],
-            'total_weight': 0,
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        return config_error_data(e)
+
+def config_error_data(error: Exception):
+    """配置加载失败时返回的数据"""
+    return {
+        'error': str(error),
+        'weights': {},
+        'pie_data': [],
+        'total_weight': 0,
+        'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def parse_monitor_query(args) -> Dict[str, Any]:
+    """解析监控列表的分页/排序/过滤参数，参数无效时抛出ValueError"""
+    sort_by = args.get('sort') or None
+    if sort_by is not None and sort_by not in SORT_KEYS:
+        raise ValueError(f'无效的排序字段: {sort_by}')
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError(f'无效的排序方向: {order}')
+    offset = int(args.get('offset', 0))
+    limit = args.get('limit')
+    limit = int(limit) if limit not in (None, '') else None
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError('offset/limit 不能为负数')
+    return {
+        'pattern': args.get('filter') or None,
+        'sort_by': sort_by,
+        'descending': order == 'desc',
+        'offset': offset,
+        'limit': limit
+    }
 
-def get_folder_monitor_data():
-    """获取文件夹监控数据"""
+def parse_time_arg(value: str):
+    """解析时间参数：epoch秒或ISO格式时间，参数无效时抛出ValueError"""
+    if value in (None, ''):
+        return None
     try:
-        # 监控配置文件列表
-        target_folder = '/root/server/MCSM_Change/my_services/model_test/test_cfg'
-        source_folder = '/root/server/MCSM_Change/my_services/Reports_mixed/output'
-        
-        target_files = []
-        source_files = []
-        
-        # 获取配置文件列表内容
-        if os.path.exists(target_folder):
-            for item in os.listdir(target_folder):
-                item_path = os.path.join(target_folder, item)
-                if os.path.isfile(item_path):
-                    stat = os.stat(item_path)
-                    target_files.append({
-                        'name': item,
-                        'size': stat.st_size,
-                        'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%m-%d %H:%M:%S'),
-                        'type': 'file'
-                    })
-                elif os.path.isdir(item_path):
-                    target_files.append({
-                        'name': item,
-                        'size': 0,
-                        'modified': '',
-                        'type': 'directory'
-                    })
-        
-        # 获取未挂载的配置文件列表内容
-        if os.path.exists(source_folder):
-            for item in os.listdir(source_folder):
-                item_path = os.path.join(source_folder, item)
-                if os.path.isfile(item_path):
-                    stat = os.stat(item_path)
-                    source_files.append({
-                        'name': item,
-                        'size': stat.st_size,
-                        'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%m-%d %H:%M:%S'),
-                        'type': 'file'
-                    })
-                elif os.path.isdir(item_path):
-                    source_files.append({
-                        'name': item,
-                        'size': 0,
-                        'modified': '',
-                        'type': 'directory'
-                    })
-        
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def parse_report_query(args) -> Dict[str, Any]:
+    """解析报告查询参数，参数无效时抛出ValueError"""
+    def optional_float(name):
+        value = args.get(name)
+        return float(value) if value not in (None, '') else None
+
+    limit = int(args.get('limit', 50))
+    offset = int(args.get('offset', 0))
+    if not 0 <= limit <= REPORTS_MAX_LIMIT or offset < 0:
+        raise ValueError(f'limit 须在0到{REPORTS_MAX_LIMIT}之间，offset 不能为负数')
+    query = {
+        'dimension': args.get('dimension') or None,
+        'min_score': optional_float('min_score'),
+        'max_score': optional_float('max_score'),
+        'min_overall': optional_float('min_overall'),
+        'max_overall': optional_float('max_overall'),
+        'since': parse_time_arg(args.get('since')),
+        'until': parse_time_arg(args.get('until')),
+        'limit': limit,
+        'offset': offset,
+        'include_report': args.get('include_report') in ('1', 'true')
+    }
+    if query['dimension'] is None and (query['min_score'] is not None or query['max_score'] is not None):
+        raise ValueError('min_score/max_score 需要同时指定 dimension')
+    return query
+
+def get_folder_monitor_data(query: Dict[str, Any] = None, folder: str = None):
+    """获取文件夹监控数据（来自inotify维护的内存索引），可按query分页/排序/过滤，folder指定时只查询该文件夹"""
+    try:
+        monitor = get_folder_monitor()
+        # 先取版本令牌再读列表，之后的变更都能通过增量接口补齐
+        version = monitor.version_token()
+        last_changed = monitor.changes.last_changed
+        results = {}
+        for key in ('target', 'source'):
+            if folder is not None and key != folder:
+                results[key] = {'files': [], 'total': 0}
+            elif query is None:
+                files = monitor.files(key)
+                results[key] = {'files': files, 'total': len(files)}
+            else:
+                results[key] = monitor.query(key, **query)
+        target, source = results['target'], results['source']
         return {
-            'target_folder': target_folder,
-            'source_folder': source_folder,
-            'target_files': target_files,
-            'source_files': source_files,
-            'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'target_folder': TARGET_FOLDER,
+            'source_folder': SOURCE_FOLDER,
+            'target_files': target['files'],
+            'source_files': source['files'],
+            'target_total': target['total'],
+            'source_total': source['total'],
+            'version': version,
+            'last_updated': datetime.fromtimestamp(last_changed).strftime('%Y-%m-%d %H:%M:%S')
         }
     except Exception as e:
         return {
             'error': str(e),
-            'target_folder': '/root/server/MCSM_Change/my_services/model_test/test_cfg',
-            'source_folder': '/root/server/MCSM_Change/my_services/Reports_mixed/output',
+            'target_folder': TARGET_FOLDER,
+            'source_folder': SOURCE_FOLDER,
             'target_files': [],
             'source_files': [],
+            'target_total': 0,
+            'source_total': 0,
+            'version': '',
             'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
 
+def conditional_json(etag: str, last_modified: float, build):
+    """带ETag/Last-Modified的JSON响应，客户端缓存仍有效时直接返回304，不构建响应体"""
+    last_modified_dt = datetime.fromtimestamp(int(last_modified), timezone.utc)
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = request.if_modified_since is not None and last_modified_dt <= request.if_modified_since
+    
+    if not_modified:
+        response = app.response_class(status=304)
+    else:
+        data = build()
+        response = jsonify(data)
+        if 'error' in data:
+            return response
+    response.set_etag(etag)
+    response.last_modified = last_modified_dt
+    # 允许缓存但每次需向服务端校验
+    response.cache_control.no_cache = True
+    return response
+
 @app.route('/')
 def index():
     """主页"""
@@ -131,19 +208,64 @@ def index():
 
 @app.route('/monitor')
 def monitor():
-    """文件夹监控页面"""
-    monitor_data = get_folder_monitor_data()
+    """文件夹监控页面（首屏只渲染第一页）"""
+    monitor_data = get_folder_monitor_data({
+        'pattern': None, 'sort_by': 'mtime', 'descending': True, 'offset': 0, 'limit': MONITOR_PAGE_SIZE
+    })
+    monitor_data['page_size'] = MONITOR_PAGE_SIZE
     return render_template('monitor.html', monitor_data=monitor_data)
 
 @app.route('/api/config')
 def api_config():
-    """API接口返回配置数据"""
-    return jsonify(get_config_data())
+    """API接口返回配置数据，支持ETag/Last-Modified条件请求"""
+    try:
+        config_manager = get_config_manager()
+        version = get_config_version(refresh=False)
+    except Exception as e:
+        # 配置无法加载时没有可用的版本，返回不带校验器的错误数据
+        return jsonify(config_error_data(e))
+    return conditional_json(version['etag'], version['last_modified'], lambda: get_config_data(version, config_manager))
+
+@app.route('/api/config_cache')
+def api_config_cache():
+    """API接口返回配置缓存命中统计"""
+    return jsonify(get_config_cache_stats())
 
 @app.route('/api/monitor')
 def api_monitor():
-    """API接口返回监控数据"""
-    return jsonify(get_folder_monitor_data())
+    """API接口返回监控数据，支持 offset/limit 分页、sort=name|mtime|size 与 order=asc|desc 排序、filter 前缀或glob过滤、folder=source|target"""
+    query, folder = None, None
+    if request.args:
+        try:
+            query = parse_monitor_query(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        folder = request.args.get('folder')
+        if folder not in (None, 'source', 'target'):
+            return jsonify({'error': '无效的文件夹类型'}), 400
+    
+    def build():
+        data = get_folder_monitor_data(query, folder)
+        if query is not None:
+            data.update({'offset': query['offset'], 'limit': query['limit']})
+        return data
+    
+    # 内容版本 = 索引版本令牌 + 查询参数
+    monitor = get_folder_monitor()
+    tag_source = repr((monitor.version_token(), sorted(request.args.items(multi=True))))
+    etag = hashlib.sha1(tag_source.encode()).hexdigest()
+    return conditional_json(etag, monitor.changes.last_changed, build)
+
+@app.route('/api/monitor/changes')
+def api_monitor_changes():
+    """增量变更接口：返回since令牌之后的新增/修改/删除条目，wait>0时长轮询等待变更"""
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), MONITOR_MAX_WAIT)
+    except ValueError:
+        return jsonify({'error': '无效的wait参数'}), 400
+    data = get_folder_monitor().changes_since(request.args.get('since', ''), wait)
+    data['last_updated'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return jsonify(data)
 
 @app.route('/api/rename_file', methods=['POST'])
 def rename_file():
@@ -159,9 +281,9 @@ def rename_file():
         
         # 确定文件夹路径
         if folder_type == 'source':
-            folder_path = '/root/server/MCSM_Change/my_services/Reports_mixed/output'
+            folder_path = SOURCE_FOLDER
         elif folder_type == 'target':
-            folder_path = '/root/server/MCSM_Change/my_services/model_test/test_cfg'
+            folder_path = TARGET_FOLDER
         else:
             return jsonify({'success': False, 'error': '无效的文件夹类型'})
         
@@ -178,6 +300,8 @@ def rename_file():
         
         # 执行重命名
         os.rename(old_path, new_path)
+        get_folder_monitor().refresh(folder_type, old_name)
+        get_folder_monitor().refresh(folder_type, new_name)
         
         return jsonify({'success': True, 'message': f'文件重命名成功: {old_name} -> {new_name}'})
         
@@ -194,8 +318,8 @@ def transfer_file():
         if not file_name:
             return jsonify({'success': False, 'error': '缺少文件名参数'})
         
-        source_path = os.path.join('/root/server/MCSM_Change/my_services/Reports_mixed/output', file_name)
-        target_path = os.path.join('/root/server/MCSM_Change/my_services/model_test/test_cfg', file_name)
+        source_path = os.path.join(SOURCE_FOLDER, file_name)
+        target_path = os.path.join(TARGET_FOLDER, file_name)
         
         # 检查源文件是否存在
         if not os.path.exists(source_path):
@@ -206,13 +330,18 @@ def transfer_file():
             return jsonify({'success': False, 'error': f'目标文件 {file_name} 已存在'})
         
         # 确保配置文件列表存在
-        os.makedirs('/root/server/MCSM_Change/my_services/model_test/test_cfg', exist_ok=True)
+        os.makedirs(TARGET_FOLDER, exist_ok=True)
         
-        # 执行文件传输
-        import shutil
-        shutil.copy2(source_path, target_path)
+        # 执行文件传输（同一文件系统上优先硬链接/reflink，避免数据经过用户态）
+        result = transfer_path(source_path, target_path, allow_link=data.get('link', True) is not False)
+        get_folder_monitor().refresh('target', file_name)
         
-        return jsonify({'success': True, 'message': f'文件传输成功: {file_name}'})
+        return jsonify({
+            'success': True,
+            'message': f'文件传输成功: {file_name}',
+            'method': result['method'],
+            'methods': result['methods']
+        })
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
@@ -227,18 +356,24 @@ def delete_file():
         if not file_name:
             return jsonify({'success': False, 'error': '缺少文件名参数'})
         
-        target_path = os.path.join('/root/server/MCSM_Change/my_services/model_test/test_cfg', file_name)
+        target_path = os.path.join(TARGET_FOLDER, file_name)
         
         # 检查文件是否存在
         if not os.path.exists(target_path):
             return jsonify({'success': False, 'error': f'文件 {file_name} 不存在'})
         
-        # 执行删除
+        # 执行删除：目录默认原子移入回收站后立即返回，由后台清理器删除
+        if data.get('background', os.path.isdir(target_path)):
+            task = get_trash_reaper().move_to_trash(TARGET_FOLDER, file_name)
+            get_folder_monitor().refresh('target', file_name)
+            return jsonify({'success': True, 'message': f'文件已移入回收站，后台删除中: {file_name}', 'task_id': task.id})
+        
         if os.path.isfile(target_path):
             os.remove(target_path)
         elif os.path.isdir(target_path):
             import shutil
             shutil.rmtree(target_path)
+        get_folder_monitor().refresh('target', file_name)
         
         return jsonify({'success': True, 'message': f'文件删除成功: {file_name}'})
         
@@ -255,18 +390,24 @@ def delete_source_file():
         if not file_name:
             return jsonify({'success': False, 'error': '缺少文件名参数'})
         
-        source_path = os.path.join('/root/server/MCSM_Change/my_services/Reports_mixed/output', file_name)
+        source_path = os.path.join(SOURCE_FOLDER, file_name)
         
         # 检查文件是否存在
         if not os.path.exists(source_path):
             return jsonify({'success': False, 'error': f'文件 {file_name} 不存在'})
         
-        # 执行删除
+        # 执行删除：目录默认原子移入回收站后立即返回，由后台清理器删除
+        if data.get('background', os.path.isdir(source_path)):
+            task = get_trash_reaper().move_to_trash(SOURCE_FOLDER, file_name)
+            get_folder_monitor().refresh('source', file_name)
+            return jsonify({'success': True, 'message': f'文件已移入回收站，后台删除中: {file_name}', 'task_id': task.id})
+        
         if os.path.isfile(source_path):
             os.remove(source_path)
         elif os.path.isdir(source_path):
             import shutil
             shutil.rmtree(source_path)
+        get_folder_monitor().refresh('source', file_name)
         
         return jsonify({'success': True, 'message': f'文件删除成功: {file_name}'})
         
@@ -275,47 +416,302 @@ def delete_source_file():
 
 @app.route('/api/run_fusion_evaluator', methods=['POST'])
 def run_fusion_evaluator():
-    """运行fusion_evaluator.py文件"""
+    """在进程内运行融合评估器，返回结构化的配置/报告"""
     try:
-        import subprocess
-        import sys
-        
-        # 使用绝对路径
-        script_path = '/root/server/MCSM_Change/my_services/Reports_mixed/fusion_evaluator.py'
-        
-        # 检查文件是否存在
-        if not os.path.exists(script_path):
-            return jsonify({'success': False, 'error': f'文件不存在: {script_path}'})
-        
-        # 运行Python脚本
-        result = subprocess.run(
-            [sys.executable, script_path],
-            capture_output=True,
-            text=True,
-            cwd='/root/server/MCSM_Change/my_services/Reports_mixed',
-            timeout=60  # 设置60秒超时
-        )
-        
-        if result.returncode == 0:
-            return jsonify({
-                'success': True, 
-                'message': 'fusion_evaluator.py 运行成功',
-                'output': result.stdout,
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
-        else:
-            return jsonify({
-                'success': False, 
-                'error': f'运行失败，返回码: {result.returncode}',
-                'stderr': result.stderr,
-                'stdout': result.stdout
-            })
+        data = request.get_json(silent=True) or {}
+        evaluate = bool(data.get('evaluate', False))
+        
+        # 在常驻工作线程中运行，无需启动子进程
+        result = get_evaluator_runner().run(evaluate=evaluate, timeout=60)
+        
+        return jsonify({
+            'success': True,
+            'message': '融合评估器运行成功',
+            'filename': result['filename'],
+            'config': result['config'],
+            'report': result.get('report'),
+            'duration': result['duration'],
+            'timestamp': result['timestamp']
+        })
             
-    except subprocess.TimeoutExpired:
+    except FuturesTimeoutError:
         return jsonify({'success': False, 'error': '运行超时（60秒）'})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """提交异步评估任务，立即返回任务ID"""
+    try:
+        data = request.get_json(silent=True) or {}
+        job, created = get_job_queue().submit(evaluate=bool(data.get('evaluate', False)))
+        return jsonify({
+            'success': True,
+            'job_id': job.id,
+            'status': job.status,
+            'created': created,
+            'message': '任务已提交' if created else '相同任务正在执行，已合并到现有任务'
+        }), 202
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/jobs')
+def list_jobs():
+    """列出最近的评估任务"""
+    jobs = get_job_queue().list()
+    return jsonify({'jobs': [job.to_dict(include_result=False) for job in reversed(jobs)]})
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """查询评估任务状态与结果"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f'任务 {job_id} 不存在'}), 404
+    return jsonify(dict(job.to_dict(), success=True))
+
+@app.route('/api/jobs/<job_id>/events')
+def stream_job_events(job_id):
+    """以Server-Sent Events推送评估任务日志"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f'任务 {job_id} 不存在'}), 404
+    
+    # 断线重连时从Last-Event-ID之后继续推送
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('since'))
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+    
+    def generate():
+        for item in job.iter_events(start):
+            if item is None:
+                yield ': keepalive\n\n'
+                continue
+            index, event = item
+            yield f"id: {index}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        yield f"event: end\ndata: {json.dumps(job.to_dict(include_result=False), ensure_ascii=False)}\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+FOLDERS = {'source': SOURCE_FOLDER, 'target': TARGET_FOLDER}
+
+def resolve_bulk_names(data: Dict[str, Any], folder_type: str):
+    """从请求中取出文件名列表（names列表和/或pattern前缀/glob），去重并保持顺序"""
+    names = data.get('names') or []
+    if not isinstance(names, list):
+        raise ValueError('names 必须是列表')
+    if not all(isinstance(name, str) for name in names):
+        raise ValueError('names 中的文件名必须是字符串')
+    pattern = data.get('pattern')
+    if pattern:
+        names = names + sorted(get_folder_monitor().names(folder_type, pattern))
+    return list(dict.fromkeys(names))
+
+def bulk_response(results, atomic: bool, folder_type: str, names):
+    """汇总批量操作结果，并刷新监控索引中的names（仅传入实际处理成功的文件名，未通过校验的名称不得进入索引）"""
+    for name in names:
+        get_folder_monitor().refresh(folder_type, name)
+    succeeded = sum(1 for result in results if result['success'])
+    return jsonify({
+        'success': succeeded == len(results),
+        'mode': 'atomic' if atomic else 'best_effort',
+        'total': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results
+    })
+
+@app.route('/api/bulk/transfer', methods=['POST'])
+def bulk_transfer_files():
+    """批量传输未挂载的配置文件到配置文件列表"""
+    try:
+        data = request.get_json()
+        names = resolve_bulk_names(data, 'source')
+        if not names:
+            return jsonify({'success': False, 'error': '没有匹配的文件'})
+        atomic = bool(data.get('atomic', False))
+        results = bulk_transfer(SOURCE_FOLDER, TARGET_FOLDER, names, atomic,
+                                allow_link=data.get('link', True) is not False)
+        return bulk_response(results, atomic, 'target', [result['name'] for result in results if result['success']])
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/bulk/delete', methods=['POST'])
+def bulk_delete_files():
+    """批量删除指定文件夹中的文件"""
+    try:
+        data = request.get_json()
+        folder_type = data.get('folder_type')
+        if folder_type not in FOLDERS:
+            return jsonify({'success': False, 'error': '无效的文件夹类型'})
+        names = resolve_bulk_names(data, folder_type)
+        if not names:
+            return jsonify({'success': False, 'error': '没有匹配的文件'})
+        atomic = bool(data.get('atomic', False))
+        results = bulk_delete(FOLDERS[folder_type], names, atomic, background=bool(data.get('background', False)))
+        return bulk_response(results, atomic, folder_type, [result['name'] for result in results if result['success']])
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/trash')
+def list_trash_tasks():
+    """列出后台删除任务及进度"""
+    tasks = get_trash_reaper().list()
+    return jsonify({'tasks': [task.to_dict() for task in reversed(tasks)]})
+
+@app.route('/api/trash/<task_id>')
+def get_trash_task(task_id):
+    """查询后台删除任务进度"""
+    task = get_trash_reaper().get(task_id)
+    if task is None:
+        return jsonify({'success': False, 'error': f'任务 {task_id} 不存在'}), 404
+    return jsonify(dict(task.to_dict(), success=True))
+
+@app.route('/api/bulk/rename', methods=['POST'])
+def bulk_rename_files():
+    """批量重命名指定文件夹中的文件"""
+    try:
+        data = request.get_json()
+        folder_type = data.get('folder_type')
+        if folder_type not in FOLDERS:
+            return jsonify({'success': False, 'error': '无效的文件夹类型'})
+        renames = [(item.get('old_name'), item.get('new_name')) for item in data.get('renames') or []]
+        if not renames:
+            return jsonify({'success': False, 'error': '缺少重命名列表'})
+        atomic = bool(data.get('atomic', False))
+        results = bulk_rename(FOLDERS[folder_type], renames, atomic)
+        touched = [name for pair, result in zip(renames, results) if result['success'] for name in pair]
+        return bulk_response(results, atomic, folder_type, touched)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/reports')
+def list_reports():
+    """按时间/综合得分/维度得分查询历史评估报告（索引查询，按生成时间倒序）"""
+    try:
+        query = parse_report_query(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        reports = get_report_store().query(**query)
+        return jsonify({'success': True, 'reports': reports, 'count': len(reports)})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/history')
+def score_history():
+    """综合得分/维度得分的分桶时间序列（每桶min/max/mean/count），用于绘制长时间范围的趋势图"""
+    try:
+        metrics = [m for m in (request.args.get('metrics') or OVERALL_METRIC).split(',') if m]
+        until = parse_time_arg(request.args.get('until')) or datetime.now().timestamp()
+        since = parse_time_arg(request.args.get('since'))
+        if since is None:
+            since = until - HISTORY_DEFAULT_RANGE
+        if since >= until:
+            raise ValueError('since 必须早于 until')
+        bucket = request.args.get('bucket')
+        if bucket not in (None, ''):
+            bucket = int(bucket)
+            if bucket <= 0 or (until - since) / bucket > HISTORY_MAX_POINTS:
+                raise ValueError(f'bucket 须为正数且点数不超过{HISTORY_MAX_POINTS}')
+        else:
+            max_points = int(request.args.get('max_points', 300))
+            if not 0 < max_points <= HISTORY_MAX_POINTS:
+                raise ValueError(f'max_points 须在1到{HISTORY_MAX_POINTS}之间')
+            bucket = choose_bucket(until - since, max_points)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        series = get_report_store().history(metrics, since, until, bucket)
+        return jsonify({
+            'success': True,
+            'since': since,
+            'until': until,
+            'bucket': bucket,
+            'series': series
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/reports/<int:report_id>')
+def get_report(report_id):
+    """获取单份完整评估报告"""
+    report = get_report_store().get(report_id)
+    if report is None:
+        return jsonify({'success': False, 'error': f'报告 {report_id} 不存在'}), 404
+    return jsonify(dict(report, success=True))
+
+@app.route('/api/scoring/schema')
+def scoring_schema():
+    """批量评分的子测试列顺序与子测试权重"""
+    return jsonify(get_scoring_schema().to_dict())
+
+@app.route('/api/score_batch', methods=['POST'])
+def score_models():
+    """批量评分：scores为N×M子测试得分矩阵（列见/api/scoring/schema，或由columns指定），可选models与weights"""
+    try:
+        data = request.get_json()
+        if not data or 'scores' not in data:
+            return jsonify({'success': False, 'error': '缺少scores参数'})
+        result = score_batch(data['scores'], columns=data.get('columns'), models=data.get('models'),
+                             weights=data.get('weights'))
+        return jsonify(dict(result, success=True))
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/weights/sweep', methods=['POST'])
+def sweep_evaluation_weights():
+    """权重敏感性扫描：用已入库报告的维度得分，在网格或随机采样的权重向量下重算综合得分与排名"""
+    try:
+        data = request.get_json() or {}
+        dimensions = list(get_scoring_schema().dimensions)
+        report_ids = data.get('report_ids')
+        if report_ids is not None:
+            report_ids = [int(report_id) for report_id in report_ids]
+        candidates = get_report_store().dimension_scores(report_ids, limit=int(data.get('reports', 1)))
+        if not candidates:
+            return jsonify({'success': False, 'error': '没有可用的评估报告'})
+        for report_id, scores in candidates:
+            missing = [dim for dim in dimensions if dim not in scores]
+            if missing:
+                return jsonify({'success': False, 'error': f"报告 {report_id} 缺少维度得分: {', '.join(missing)}"})
+
+        axes = None
+        if data.get('grid'):
+            base = get_config_manager().get_weight_values(dimensions)
+            weight_vectors, axes = grid_weight_vectors(dimensions, base, data['grid'])
+        else:
+            weight_vectors = random_weight_vectors(dimensions, int(data.get('samples', 1000)), data.get('seed'))
+
+        result = sweep_weights([[scores[dim] for dim in dimensions] for _, scores in candidates], weight_vectors)
+        return jsonify(dict(result, success=True,
+                            dimensions=dimensions,
+                            report_ids=[report_id for report_id, _ in candidates],
+                            dimension_scores=[scores for _, scores in candidates],
+                            weights=weight_vectors,
+                            axes=axes))
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
+@app.route('/api/retention')
+def retention_status():
+    """查询输出目录保留策略及最近一次清理结果"""
+    return jsonify(get_retention_manager().status())
+
+@app.route('/api/retention/run', methods=['POST'])
+def run_retention():
+    """立即按当前保留策略清理一次输出目录（策略未启用时也会执行）"""
+    try:
+        result = get_retention_manager().run_once()
+        return jsonify(dict(result, success=True))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 def initialize_all_weights_to_default():
     """仅在程序第一次运行时将所有权重初始化为0.3"""
     try:
@@ -331,26 +727,8 @@ def initialize_all_weights_to_default():
         dimensions = ['privacy', 'functionality', 'infrastructure', 'performance', 'security']
         default_weight = 0.3
         
-        # 读取fusion_evaluator.py文件
-        script_path = '/root/server/MCSM_Change/my_services/Reports_mixed/fusion_evaluator.py'
-        with open(script_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        import re
-        
-        # 为每个维度更新权重
-        for dimension in dimensions:
-            # 构建更精确的正则表达式来匹配get_default_config方法中的权重
-            # 匹配格式: "dimension": {"weight": value}
-            pattern = rf'(\s*)"{dimension}":\s*\{{"weight":\s*([0-9.]+)\}}'
-            replacement = rf'\1"{dimension}": {{"weight": {default_weight}}}'
-            
-            # 执行替换
-            content = re.sub(pattern, replacement, content)
-        
-        # 写回文件
-        with open(script_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # 批量写入权重存储
+        get_weight_store().update({dimension: default_weight for dimension in dimensions})
         
         # 创建初始化标记文件
         with open(init_flag_file, 'w', encoding='utf-8') as f:
@@ -363,39 +741,6 @@ def initialize_all_weights_to_default():
         print(f"❌ 初始化权重失败: {e}")
         return False
 
-def update_fusion_evaluator_weights(dimension: str, new_weight: float):
-    """直接更新fusion_evaluator.py文件中的权重配置"""
-    try:
-        # 读取fusion_evaluator.py文件
-        script_path = '/root/server/MCSM_Change/my_services/Reports_mixed/fusion_evaluator.py'
-        with open(script_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        import re
-        
-        # 构建更精确的正则表达式来匹配get_default_config方法中的权重
-        # 匹配格式: "dimension": {"weight": value}
-        pattern = rf'(\s*)"{dimension}":\s*\{{"weight":\s*([0-9.]+)\}}'
-        replacement = rf'\1"{dimension}": {{"weight": {new_weight}}}'
-        
-        # 执行替换
-        new_content = re.sub(pattern, replacement, content)
-        
-        # 检查是否成功替换
-        if new_content == content:
-            print(f"警告: 未找到维度 '{dimension}' 的权重配置")
-            return False
-        
-        # 写回文件
-        with open(script_path, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
-        print(f"✅ 成功更新 {dimension} 权重为 {new_weight}")
-        return True
-    except Exception as e:
-        print(f"❌ 更新fusion_evaluator.py文件失败: {e}")
-        return False
-
 @app.route('/api/update_weight', methods=['POST'])
 def update_weight():
     """更新权重配置"""
@@ -404,24 +749,81 @@ def update_weight():
         dimension = data.get('dimension')
         new_weight = float(data.get('weight'))
         
-        if not dimension or new_weight < 0:
+        if not dimension or new_weight < 0 or not math.isfinite(new_weight):
             return jsonify({'success': False, 'error': '无效的参数'})
         
-        # 直接更新fusion_evaluator.py文件中的权重
-        if update_fusion_evaluator_weights(dimension, new_weight):
-            return jsonify({'success': True, 'message': f'权重更新成功: {dimension} = {new_weight}'})
-        else:
-            return jsonify({'success': False, 'error': '更新fusion_evaluator.py文件失败'})
+        if dimension not in get_config_manager().get_weights():
+            return jsonify({'success': False, 'error': f'未找到维度 {dimension} 的权重配置'})
+        
+        # 内存更新并原子写入权重存储
+        get_weight_store().set(dimension, new_weight)
+        return jsonify({'success': True, 'message': f'权重更新成功: {dimension} = {new_weight}'})
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/update_weights', methods=['POST'])
+def update_weights():
+    """批量更新权重配置，一次校验、一次原子写入"""
+    try:
+        data = request.get_json()
+        weights = data.get('weights')
+        normalize = bool(data.get('normalize', False))
+        
+        if not isinstance(weights, dict) or not weights:
+            return jsonify({'success': False, 'error': '缺少权重参数'})
+        
+        current_weights = get_config_manager().get_weights()
+        
+        # 先校验整组权重，任一无效则整体拒绝
+        new_weights = {}
+        for dimension, value in weights.items():
+            if dimension not in current_weights:
+                return jsonify({'success': False, 'error': f'未找到维度 {dimension} 的权重配置'})
+            try:
+                weight = float(value)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'error': f'维度 {dimension} 的权重无效: {value}'})
+            if weight < 0 or not math.isfinite(weight):
+                return jsonify({'success': False, 'error': f'维度 {dimension} 的权重无效: {value}'})
+            new_weights[dimension] = weight
+        
+        # 按需归一化到总和1.0（未提交的维度按当前值参与归一化）
+        if normalize:
+            merged = {dim: cfg.get('weight', 0) for dim, cfg in current_weights.items()}
+            merged.update(new_weights)
+            total = sum(merged.values())
+            if total <= 0:
+                return jsonify({'success': False, 'error': '权重总和为0，无法归一化'})
+            new_weights = {dim: round(weight / total, 6) for dim, weight in merged.items()}
+        
+        stored = get_weight_store().update(new_weights)
+        return jsonify({
+            'success': True,
+            'message': f'批量更新权重成功: {len(new_weights)} 个维度',
+            'weights': stored,
+            'total_weight': sum(stored.get(dim, cfg.get('weight', 0)) for dim, cfg in current_weights.items())
+        })
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+
 if __name__ == '__main__':
     # 确保templates目录存在
     templates_dir = '/root/server/MCSM_Change/my_services/Reports_mixed/templates'
     if not os.path.exists(templates_dir):
         os.makedirs(templates_dir)
     
+    # 清理上次退出前回收站中未删除完的条目
+    for folder in FOLDERS.values():
+        get_trash_reaper().recover(staging_dir_for(folder))
+    
+    # 把尚未入库的历史报告导入报告存储
+    get_report_store().import_directory(SOURCE_FOLDER)
+    
+    # 启动输出目录保留策略后台线程（需在output_settings.retention中启用）
+    get_retention_manager()
+    
     # 在程序启动时初始化所有权重为0.3
     print("🔧 初始化权重配置...")
     initialize_all_weights_to_default()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出文件编码
+"""
+
+import gzip
+import json
+import logging
+import zlib
+from typing import Dict, Any, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# 序列化格式：pretty为原有的缩进JSON，minified为紧凑JSON，orjson为orjson编码的紧凑JSON，msgpack为二进制
+OUTPUT_FORMATS = ('pretty', 'minified', 'orjson', 'msgpack')
+COMPRESSIONS = ('none', 'gzip', 'zstd')
+DEFAULT_OUTPUT_FORMAT = {
+    "format": "pretty",
+    "compression": "none"
+}
+
+FORMAT_EXTENSIONS = {'pretty': '.json', 'minified': '.json', 'orjson': '.json', 'msgpack': '.msgpack'}
+COMPRESSION_EXTENSIONS = {'none': '', 'gzip': '.gz', 'zstd': '.zst'}
+DOCUMENT_EXTENSIONS = tuple(f + c for f in set(FORMAT_EXTENSIONS.values()) for c in COMPRESSION_EXTENSIONS.values())
+
+class DocumentFormatError(ValueError):
+    """文档内容无法识别，或解码所需的可选依赖未安装"""
+
+# 文档内容损坏或格式不符时loads可能抛出的异常（不含文件读写错误与调用方自己的校验错误）
+DECODE_ERRORS = (DocumentFormatError, json.JSONDecodeError, UnicodeDecodeError, gzip.BadGzipFile, EOFError, zlib.error)
+if orjson is not None:
+    DECODE_ERRORS += (orjson.JSONDecodeError,)
+if msgpack is not None:
+    DECODE_ERRORS += (msgpack.exceptions.UnpackException,)
+if zstandard is not None:
+    DECODE_ERRORS += (zstandard.ZstdError,)
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+def resolve_output_format(settings: Dict[str, Any] = None) -> Tuple[str, str]:
+    """解析output_settings中的格式与压缩方式；可选依赖未安装时降级（orjson/msgpack -> minified，zstd -> gzip）"""
+    settings = settings or {}
+    fmt = settings.get('format', DEFAULT_OUTPUT_FORMAT['format'])
+    compression = settings.get('compression') or DEFAULT_OUTPUT_FORMAT['compression']
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"不支持的压缩方式: {compression}")
+    if (fmt == 'orjson' and orjson is None) or (fmt == 'msgpack' and msgpack is None):
+        logger.warning(f"⚠️ 未安装{fmt}，改用minified格式")
+        fmt = 'minified'
+    if compression == 'zstd' and zstandard is None:
+        logger.warning("⚠️ 未安装zstandard，改用gzip压缩")
+        compression = 'gzip'
+    return fmt, compression
+
+def output_extension(fmt: str, compression: str) -> str:
+    """格式对应的文件扩展名，如 .json、.msgpack.gz"""
+    return FORMAT_EXTENSIONS[fmt] + COMPRESSION_EXTENSIONS[compression]
+
+def is_document_name(name: str) -> bool:
+    """文件名是否为本模块可能写出的文档"""
+    return name.endswith(DOCUMENT_EXTENSIONS)
+
+def dumps(data: Any, fmt: str = 'pretty', compression: str = 'none') -> bytes:
+    """按格式序列化并压缩为字节"""
+    if fmt == 'pretty':
+        raw = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    elif fmt == 'minified':
+        raw = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    elif fmt == 'orjson':
+        raw = orjson.dumps(data)
+    elif fmt == 'msgpack':
+        raw = msgpack.packb(data, use_bin_type=True)
+    else:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    if compression == 'gzip':
+        # mtime固定为0，相同内容得到相同字节
+        return gzip.compress(raw, compresslevel=6, mtime=0)
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor().compress(raw)
+    return raw
+
+def loads(raw: bytes) -> Any:
+    """按内容自动识别压缩方式与格式并反序列化，JSON与msgpack均可读取"""
+    if raw.startswith(GZIP_MAGIC):
+        raw = gzip.decompress(raw)
+    elif raw.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise DocumentFormatError("文件为zstd压缩，但未安装zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+    # JSON文档以对象/数组开头（可能带BOM或空白），其余按msgpack处理
+    head = raw.lstrip()[:1]
+    if raw.startswith(b'\xef\xbb\xbf') or head in (b'{', b'['):
+        if orjson is not None and not raw.startswith(b'\xef\xbb\xbf'):
+            return orjson.loads(raw)
+        return json.loads(raw.decode('utf-8-sig'))
+    if msgpack is None:
+        raise DocumentFormatError("文件不是JSON格式，且未安装msgpack")
+    try:
+        return msgpack.unpackb(raw, raw=False)
+    except ValueError as e:
+        # 不完整的输入等情况msgpack只抛出普通ValueError
+        raise DocumentFormatError(f"msgpack解码失败: {e}") from e
+
+def read_document(path: str) -> Any:
+    """读取任意格式写出的文档"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+def write_document(path: str, data: Any, fmt: str = 'pretty', compression: str = 'none'):
+    """按格式写出文档"""
+    payload = dumps(data, fmt, compression)
+    with open(path, 'wb') as f:
+        f.write(payload)
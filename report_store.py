@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评估报告存储
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from output_format import DECODE_ERRORS, is_document_name, read_document
+
+logger = logging.getLogger(__name__)
+
+# 报告索引数据库，与weights.json同目录
+REPORT_STORE_PATH = "/root/server/MCSM_Change/my_services/Reports_mixed/reports.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT UNIQUE,
+    generated_at REAL NOT NULL,
+    overall_score REAL,
+    total_weighted_score REAL,
+    total_weight REAL,
+    duration REAL,
+    weights TEXT,
+    report TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_generated_at ON reports (generated_at);
+CREATE INDEX IF NOT EXISTS idx_reports_overall_score ON reports (overall_score);
+CREATE TABLE IF NOT EXISTS dimension_scores (
+    report_id INTEGER NOT NULL REFERENCES reports (id) ON DELETE CASCADE,
+    dimension TEXT NOT NULL,
+    score REAL,
+    max_score REAL,
+    weight REAL,
+    weighted_score REAL,
+    generated_at REAL NOT NULL,
+    PRIMARY KEY (report_id, dimension)
+);
+CREATE INDEX IF NOT EXISTS idx_dimension_scores_score ON dimension_scores (dimension, score);
+CREATE INDEX IF NOT EXISTS idx_dimension_scores_time ON dimension_scores (dimension, generated_at);
+CREATE TABLE IF NOT EXISTS score_rollups (
+    resolution INTEGER NOT NULL,
+    metric TEXT NOT NULL,
+    bucket_start REAL NOT NULL,
+    count INTEGER NOT NULL,
+    min REAL,
+    max REAL,
+    sum REAL,
+    PRIMARY KEY (resolution, metric, bucket_start)
+);
+"""
+
+# 预聚合的时间粒度（秒）：小时、天；桶按UTC epoch对齐
+ROLLUP_RESOLUTIONS = (3600, 86400)
+# 综合得分在rollup中的指标名，其余指标为维度名
+OVERALL_METRIC = 'overall'
+
+ROLLUP_UPSERT = (
+    'INSERT INTO score_rollups (resolution, metric, bucket_start, count, min, max, sum) VALUES (?, ?, ?, 1, ?, ?, ?) '
+    'ON CONFLICT (resolution, metric, bucket_start) DO UPDATE SET count = count + 1, '
+    'min = MIN(min, excluded.min), max = MAX(max, excluded.max), sum = sum + excluded.sum'
+)
+
+# 历史曲线可选的分桶宽度（秒），≥1小时的都能由预聚合合并得到
+HISTORY_BUCKETS = (60, 300, 900, 3600, 3 * 3600, 6 * 3600, 12 * 3600, 86400, 7 * 86400, 30 * 86400)
+
+def choose_bucket(span: float, max_points: int) -> int:
+    """选择使点数不超过max_points的最小分桶宽度"""
+    for bucket in HISTORY_BUCKETS:
+        if span / bucket <= max_points:
+            return bucket
+    days = -(-span // (86400 * max_points))
+    return int(days) * 86400
+
+# 列表查询返回的摘要列（不含完整报告）
+SUMMARY_COLUMNS = ('id', 'filename', 'generated_at', 'overall_score', 'total_weighted_score',
+                   'total_weight', 'duration', 'weights')
+
+def parse_report_time(report: Dict[str, Any], fallback: float = None) -> float:
+    """报告生成时间（epoch秒），取metadata.generated_timestamp，缺失时用fallback"""
+    value = report.get('metadata', {}).get('generated_timestamp')
+    if value:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return fallback if fallback is not None else datetime.now().timestamp()
+
+class ReportStore:
+    """追加写入的报告存储：SQLite保存完整报告，并按时间、综合得分、各维度得分建立索引"""
+
+    def __init__(self, path: str = REPORT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            # WAL模式下读写互不阻塞，Web进程查询时评估器可以继续写入
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA foreign_keys=ON')
+            self._conn.executescript(SCHEMA)
+            has_reports = self._conn.execute('SELECT 1 FROM reports LIMIT 1').fetchone()
+            has_rollups = self._conn.execute('SELECT 1 FROM score_rollups LIMIT 1').fetchone()
+            if has_reports and not has_rollups:
+                self._rebuild_rollups()
+
+    def add(self, report: Dict[str, Any], filename: str = None, generated_at: float = None) -> Optional[int]:
+        """追加一份报告，返回报告ID；同名文件已存在时忽略并返回None"""
+        summary = report.get('summary', {})
+        results = report.get('detailed_results', [])
+        if generated_at is None:
+            generated_at = parse_report_time(report)
+        weights = {item['dimension']: item.get('weight') for item in results}
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO reports (filename, generated_at, overall_score, total_weighted_score, '
+                'total_weight, duration, weights, report) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (filename, generated_at, summary.get('overall_score'), summary.get('total_weighted_score'),
+                 summary.get('total_weight'), report.get('metadata', {}).get('evaluation_duration'),
+                 json.dumps(weights, ensure_ascii=False),
+                 json.dumps(report, ensure_ascii=False, separators=(',', ':'))))
+            if cursor.rowcount == 0:
+                return None
+            report_id = cursor.lastrowid
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO dimension_scores (report_id, dimension, score, max_score, weight, '
+                'weighted_score, generated_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(report_id, item['dimension'], item.get('score'), item.get('max_score'), item.get('weight'),
+                  item.get('weighted_score'), generated_at) for item in results])
+            metrics = [(OVERALL_METRIC, summary.get('overall_score'))]
+            metrics.extend((item['dimension'], item.get('score')) for item in results)
+            self._conn.executemany(ROLLUP_UPSERT, [
+                (resolution, metric, int(generated_at // resolution) * resolution, value, value, value)
+                for resolution in ROLLUP_RESOLUTIONS
+                for metric, value in metrics if value is not None])
+        return report_id
+
+    def _rebuild_rollups(self):
+        """由明细表重建预聚合（调用方需持有锁并处于事务中）"""
+        self._conn.execute('DELETE FROM score_rollups')
+        for resolution in ROLLUP_RESOLUTIONS:
+            self._conn.execute(
+                'INSERT INTO score_rollups SELECT ?, ?, CAST(generated_at / ? AS INTEGER) * ?, COUNT(overall_score), '
+                'MIN(overall_score), MAX(overall_score), SUM(overall_score) FROM reports '
+                'WHERE overall_score IS NOT NULL GROUP BY 3',
+                (resolution, OVERALL_METRIC, resolution, resolution))
+            self._conn.execute(
+                'INSERT INTO score_rollups SELECT ?, dimension, CAST(generated_at / ? AS INTEGER) * ?, COUNT(score), '
+                'MIN(score), MAX(score), SUM(score) FROM dimension_scores '
+                'WHERE score IS NOT NULL GROUP BY dimension, 3',
+                (resolution, resolution, resolution))
+
+    def history(self, metrics: List[str], since: float, until: float, bucket: int) -> Dict[str, List[Dict[str, Any]]]:
+        """按bucket秒分桶返回各指标的min/max/mean/count；bucket为预聚合粒度的整数倍时直接合并预聚合，否则扫描明细"""
+        resolution = next((r for r in sorted(ROLLUP_RESOLUTIONS, reverse=True) if bucket % r == 0), None)
+        series = {metric: [] for metric in metrics}
+        placeholders = ', '.join('?' for _ in metrics)
+        if resolution is not None:
+            sql = (f'SELECT metric, CAST(bucket_start / ? AS INTEGER) * ? AS bucket, SUM(count), MIN(min), MAX(max), SUM(sum) '
+                   f'FROM score_rollups WHERE resolution = ? AND metric IN ({placeholders}) '
+                   f'AND bucket_start >= ? AND bucket_start < ? GROUP BY metric, bucket ORDER BY metric, bucket')
+            # 起始时间向下对齐到桶边界，保证首个桶完整
+            params = [bucket, bucket, resolution, *metrics, since // bucket * bucket, until]
+        else:
+            parts, params = [], []
+            dimensions = [metric for metric in metrics if metric != OVERALL_METRIC]
+            if OVERALL_METRIC in metrics:
+                parts.append('SELECT ? AS metric, generated_at, overall_score AS value FROM reports '
+                             'WHERE generated_at >= ? AND generated_at < ?')
+                params.extend([OVERALL_METRIC, since, until])
+            if dimensions:
+                parts.append(f"SELECT dimension AS metric, generated_at, score AS value FROM dimension_scores "
+                             f"WHERE dimension IN ({', '.join('?' for _ in dimensions)}) "
+                             f"AND generated_at >= ? AND generated_at < ?")
+                params.extend([*dimensions, since, until])
+            sql = (f"SELECT metric, CAST(generated_at / ? AS INTEGER) * ? AS bucket, COUNT(value), MIN(value), MAX(value), "
+                   f"SUM(value) FROM ({' UNION ALL '.join(parts)}) WHERE value IS NOT NULL "
+                   f"GROUP BY metric, bucket ORDER BY metric, bucket")
+            params[:0] = [bucket, bucket]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        for metric, bucket_start, count, minimum, maximum, total in rows:
+            series[metric].append({
+                'time': bucket_start,
+                'count': count,
+                'min': minimum,
+                'max': maximum,
+                'mean': total / count if count else None
+            })
+        return series
+
+    def import_directory(self, directory: str) -> int:
+        """把目录中尚未入库的 evaluation_report_* 报告导入存储，返回导入数量"""
+        with self._lock:
+            known = {row[0] for row in self._conn.execute('SELECT filename FROM reports WHERE filename IS NOT NULL')}
+        imported = 0
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if not (entry.name.startswith('evaluation_report_') and is_document_name(entry.name)):
+                continue
+            if entry.path in known or not entry.is_file():
+                continue
+            try:
+                report = read_document(entry.path)
+                fallback = entry.stat().st_mtime
+            except (OSError, *DECODE_ERRORS) as e:
+                # 写入中途中断的报告可能是截断的压缩流，跳过即可
+                logger.warning(f"⚠️ 跳过无法读取的报告 {entry.name}: {e}")
+                continue
+            if not isinstance(report, dict):
+                logger.warning(f"⚠️ 跳过格式不符的报告 {entry.name}: 内容不是JSON对象")
+                continue
+            if self.add(report, filename=entry.path, generated_at=parse_report_time(report, fallback)) is not None:
+                imported += 1
+        if imported:
+            logger.info(f"✅ 已导入 {imported} 份历史评估报告")
+        return imported
+
+    def _summary(self, row: sqlite3.Row, include_report: bool) -> Dict[str, Any]:
+        data = {column: row[column] for column in SUMMARY_COLUMNS}
+        data['weights'] = json.loads(data['weights']) if data['weights'] else {}
+        data['generated_timestamp'] = datetime.fromtimestamp(row['generated_at']).isoformat()
+        if include_report:
+            data['report'] = json.loads(row['report'])
+        return data
+
+    def query(self, dimension: str = None, min_score: float = None, max_score: float = None,
+              min_overall: float = None, max_overall: float = None, since: float = None, until: float = None,
+              limit: int = 50, offset: int = 0, include_report: bool = False) -> List[Dict[str, Any]]:
+        """按条件查询报告（按生成时间倒序）；dimension配合min_score/max_score按维度得分过滤"""
+        columns = ', '.join(f'r.{column}' for column in SUMMARY_COLUMNS + (('report',) if include_report else ()))
+        sql = f'SELECT {columns} FROM reports r'
+        conditions, params = [], []
+        if dimension is not None:
+            sql += ' JOIN dimension_scores d ON d.report_id = r.id AND d.dimension = ?'
+            params.append(dimension)
+            if min_score is not None:
+                conditions.append('d.score >= ?')
+                params.append(min_score)
+            if max_score is not None:
+                conditions.append('d.score < ?')
+                params.append(max_score)
+        for clause, value in (('r.overall_score >= ?', min_overall), ('r.overall_score < ?', max_overall),
+                              ('r.generated_at >= ?', since), ('r.generated_at < ?', until)):
+            if value is not None:
+                conditions.append(clause)
+                params.append(value)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY r.generated_at DESC, r.id DESC LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._summary(row, include_report) for row in rows]
+
+    def recent(self, limit: int = 50, include_report: bool = False) -> List[Dict[str, Any]]:
+        """最近limit次运行"""
+        return self.query(limit=limit, include_report=include_report)
+
+    def get(self, report_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)}, report FROM reports WHERE id = ?", (report_id,)).fetchone()
+        return self._summary(row, include_report=True) if row else None
+
+    def dimension_scores(self, report_ids: List[int] = None, limit: int = 1) -> List[Tuple[int, Dict[str, float]]]:
+        """各报告的维度得分[(报告ID, {维度: 得分})]；未指定report_ids时取最近limit份，按生成时间倒序"""
+        with self._lock:
+            if report_ids is None:
+                report_ids = [row[0] for row in self._conn.execute(
+                    'SELECT id FROM reports ORDER BY generated_at DESC, id DESC LIMIT ?', (limit,))]
+            rows = self._conn.execute(
+                f"SELECT report_id, dimension, score FROM dimension_scores "
+                f"WHERE report_id IN ({', '.join('?' for _ in report_ids)})", report_ids).fetchall()
+        scores: Dict[int, Dict[str, float]] = {report_id: {} for report_id in report_ids}
+        for report_id, dimension, score in rows:
+            scores[report_id][dimension] = score
+        return [(report_id, scores[report_id]) for report_id in report_ids]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM reports').fetchone()[0]
+
+_report_store: Optional[ReportStore] = None
+_report_store_lock = threading.Lock()
+
+def get_report_store() -> ReportStore:
+    """获取进程内共享的报告存储"""
+    global _report_store
+    with _report_store_lock:
+        if _report_store is None:
+            _report_store = ReportStore()
+        return _report_store
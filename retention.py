@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出目录保留与压缩归档
+"""
+
+import gzip
+import json
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from folder_index import FileRecord, scan_folder, match_name
+from fusion_evaluator import DEFAULT_RETENTION_POLICY, ensure_output_directory, get_config_manager, logger
+from output_format import is_document_name, read_document
+
+# 受保留策略管理的文件类别（evaluation_config.json 等其他文件不受影响）
+RETENTION_GROUPS = {
+    'config': 'config_*',
+    'report': 'evaluation_report_*',
+    'multi_report': 'evaluation_multi_report_*'
+}
+ARCHIVE_DIR_NAME = 'archive'
+REPORT_TIMESTAMP_PATTERN = re.compile(r'evaluation_(?:multi_)?report_(\d{8})_\d{6}')
+
+class RetentionManager:
+    """按策略（保留最近N个、最长保留天数、总大小上限）后台清理output/，报告可先压缩归档为每天一个文件"""
+
+    def __init__(self, output_dir: str = None):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Optional[float] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def start(self) -> 'RetentionManager':
+        """启动后台线程（重复调用无副作用）"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            # 配置无效时本轮跳过，按默认间隔重试，后台线程不能因此退出
+            interval = DEFAULT_RETENTION_POLICY['interval_seconds']
+            try:
+                policy = get_config_manager().get_retention_policy()
+                configured = float(policy.get('interval_seconds', interval))
+                if not math.isfinite(configured):
+                    raise ValueError(f"无效的interval_seconds: {configured}")
+                interval = max(configured, 1.0)
+                if policy['enabled']:
+                    self.run_once(policy)
+            except Exception as e:
+                logger.error(f"❌ 输出目录保留策略执行失败: {e}")
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+
+    def select_expired(self, records: List[FileRecord], policy: Dict[str, Any], now: float) -> List[FileRecord]:
+        """按策略选出需要移除的文件"""
+        expired = {}
+        remaining = []
+        for pattern in RETENTION_GROUPS.values():
+            group = sorted((r for r in records if r.type == 'file' and is_document_name(r.name) and match_name(r.name, pattern)),
+                           key=lambda r: r.mtime, reverse=True)
+            keep_last = int(policy.get('keep_last') or 0)
+            max_age = float(policy.get('max_age_days') or 0) * 86400
+            for position, record in enumerate(group):
+                if (keep_last and position >= keep_last) or (max_age and now - record.mtime > max_age):
+                    expired[record.name] = record
+                else:
+                    remaining.append(record)
+        # 总大小上限：从最旧的文件开始移除
+        max_total_bytes = int(policy.get('max_total_bytes') or 0)
+        if max_total_bytes:
+            total = sum(r.size for r in remaining)
+            for record in sorted(remaining, key=lambda r: r.mtime):
+                if total <= max_total_bytes:
+                    break
+                expired[record.name] = record
+                total -= record.size
+        return sorted(expired.values(), key=lambda r: r.mtime)
+
+    def _archive_path(self, output_dir: str, record: FileRecord) -> str:
+        match = REPORT_TIMESTAMP_PATTERN.match(record.name)
+        day = match.group(1) if match else datetime.fromtimestamp(record.mtime).strftime('%Y%m%d')
+        return os.path.join(output_dir, ARCHIVE_DIR_NAME, f'evaluation_reports_{day}.jsonl.gz')
+
+    def _archive_reports(self, output_dir: str, records: List[FileRecord]) -> Tuple[int, Set[str]]:
+        """
+        把报告按日期追加到 archive/evaluation_reports_<日期>.jsonl.gz（每行一个报告）
+
+        返回(归档数, 无法读取的文件名)；无法读取的报告不归档，由调用方保留在原处，不影响其余文件
+        """
+        by_archive: Dict[str, List[FileRecord]] = {}
+        for record in records:
+            by_archive.setdefault(self._archive_path(output_dir, record), []).append(record)
+        os.makedirs(os.path.join(output_dir, ARCHIVE_DIR_NAME), exist_ok=True)
+        archived = 0
+        unreadable: Set[str] = set()
+        for archive_path, group in by_archive.items():
+            lines = []
+            for record in group:
+                try:
+                    report = read_document(os.path.join(output_dir, record.name))
+                except FileNotFoundError:
+                    continue
+                except Exception as e:
+                    logger.warning(f"⚠️ 报告无法读取，跳过归档并保留原文件: {record.name}: {e}")
+                    unreadable.add(record.name)
+                    continue
+                lines.append(json.dumps({'filename': record.name, 'report': report},
+                                        ensure_ascii=False, separators=(',', ':')))
+            if not lines:
+                continue
+            # gzip允许多成员拼接，追加写入即可，读取时透明解压
+            with gzip.open(archive_path, 'at', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            archived += len(lines)
+        return archived, unreadable
+
+    def run_once(self, policy: Dict[str, Any] = None) -> Dict[str, Any]:
+        """执行一次保留策略，返回移除/归档统计"""
+        with self._run_lock:
+            if policy is None:
+                policy = get_config_manager().get_retention_policy()
+            output_dir = self.output_dir or ensure_output_directory()
+            now = time.time()
+            expired = self.select_expired(list(scan_folder(output_dir).values()), policy, now)
+
+            reports = [r for r in expired if not match_name(r.name, RETENTION_GROUPS['config'])]
+            archived, unreadable = 0, set()
+            if policy.get('compact_reports') and reports:
+                archived, unreadable = self._archive_reports(output_dir, reports)
+
+            removed, freed = 0, 0
+            for record in expired:
+                if record.name in unreadable:
+                    continue
+                try:
+                    os.remove(os.path.join(output_dir, record.name))
+                except FileNotFoundError:
+                    continue
+                removed += 1
+                freed += record.size
+
+            result = {
+                'removed': removed,
+                'archived': archived,
+                'skipped': len(unreadable),
+                'bytes_freed': freed,
+                'timestamp': datetime.now().isoformat()
+            }
+            self.last_run = now
+            self.last_result = result
+            if removed:
+                logger.info(f"🧹 输出目录清理完成: 移除 {removed} 个文件，归档 {archived} 个报告，释放 {freed} 字节")
+            return result
+
+    def trigger(self):
+        """唤醒后台线程立即执行一次"""
+        self._wakeup.set()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'policy': get_config_manager().get_retention_policy(),
+            'running': self._thread is not None and self._thread.is_alive(),
+            'last_run': datetime.fromtimestamp(self.last_run).isoformat() if self.last_run else None,
+            'last_result': self.last_result
+        }
+
+_retention_manager: Optional[RetentionManager] = None
+_retention_manager_lock = threading.Lock()
+
+def get_retention_manager() -> RetentionManager:
+    """获取进程内共享的保留策略管理器"""
+    global _retention_manager
+    with _retention_manager_lock:
+        if _retention_manager is None:
+            _retention_manager = RetentionManager()
+        return _retention_manager.start()
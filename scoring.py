@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量评分
+"""
+
+import math
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from fusion_evaluator import TEST_CONFIGURATION_TEMPLATE, get_config_manager
+
+class ScoringSchema:
+    """评分结构：子测试列顺序、子测试权重以及各列所属维度，来自测试配置模板"""
+
+    def __init__(self, dimensions: Dict[str, Dict[str, Any]]):
+        self.dimensions: Tuple[str, ...] = tuple(dimensions)
+        columns, sub_weights, owners = [], [], []
+        for index, (dimension, data) in enumerate(dimensions.items()):
+            for sub_test, sub_data in data['sub_tests'].items():
+                columns.append(f'{dimension}.{sub_test}')
+                sub_weights.append(float(sub_data['weight']))
+                owners.append(index)
+        self.columns: Tuple[str, ...] = tuple(columns)
+        self.sub_weights: Tuple[float, ...] = tuple(sub_weights)
+        self.owners: Tuple[int, ...] = tuple(owners)
+        self._column_index = {column: i for i, column in enumerate(columns)}
+        if np is not None:
+            # M×D矩阵：第j列子测试权重落在其所属维度上，分数矩阵乘以它即得各维度加权平均分
+            self.sub_weight_matrix = np.zeros((len(columns), len(self.dimensions)))
+            self.sub_weight_matrix[np.arange(len(columns)), owners] = sub_weights
+
+    def column_order(self, columns: Sequence[str]) -> List[int]:
+        """把调用方给出的列名映射为结构中的列序号，缺列或未知列时抛出ValueError"""
+        unknown = [column for column in columns if column not in self._column_index]
+        if unknown:
+            raise ValueError(f"未知的子测试列: {', '.join(unknown)}")
+        missing = set(self.columns) - set(columns)
+        if missing:
+            raise ValueError(f"缺少子测试列: {', '.join(sorted(missing))}")
+        return [columns.index(column) for column in self.columns]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'dimensions': list(self.dimensions),
+            'columns': list(self.columns),
+            'sub_test_weights': list(self.sub_weights)
+        }
+
+_default_schema: Optional[ScoringSchema] = None
+
+def get_scoring_schema() -> ScoringSchema:
+    """默认评分结构（测试配置模板中的五个维度及其子测试）"""
+    global _default_schema
+    if _default_schema is None:
+        _default_schema = ScoringSchema(TEST_CONFIGURATION_TEMPLATE['test_configuration']['evaluation_dimensions'])
+    return _default_schema
+
+def _score_numpy(matrix, sub_weight_matrix, dimension_weights):
+    dimension_scores = matrix @ sub_weight_matrix
+    weighted_scores = dimension_scores * np.asarray(dimension_weights, dtype=float)
+    total_weighted = weighted_scores.sum(axis=1)
+    total_weight = float(sum(dimension_weights))
+    overall = total_weighted / total_weight if total_weight > 0 else np.zeros(len(matrix))
+    return dimension_scores.tolist(), weighted_scores.tolist(), total_weighted.tolist(), overall.tolist()
+
+def _score_python(scores, schema, dimension_weights):
+    dimension_scores, weighted_scores, total_weighted, overall = [], [], [], []
+    total_weight = sum(dimension_weights)
+    for row in scores:
+        dims = [0.0] * len(schema.dimensions)
+        for value, sub_weight, owner in zip(row, schema.sub_weights, schema.owners):
+            dims[owner] += float(value) * sub_weight
+        weighted = [score * weight for score, weight in zip(dims, dimension_weights)]
+        dimension_scores.append(dims)
+        weighted_scores.append(weighted)
+        total_weighted.append(sum(weighted))
+        overall.append(sum(weighted) / total_weight if total_weight > 0 else 0)
+    return dimension_scores, weighted_scores, total_weighted, overall
+
+def score_batch(scores: Sequence[Sequence[float]], columns: Sequence[str] = None,
+                models: Sequence[str] = None, weights: Dict[str, float] = None,
+                schema: ScoringSchema = None) -> Dict[str, Any]:
+    """
+    批量计算N个模型的维度得分、加权得分与综合得分（算法同单次评估：子测试加权平均，综合得分=加权总分/权重和）
+
+    scores为N×M子测试得分矩阵，列顺序默认同schema.columns，也可由columns指定；
+    weights可覆盖部分维度权重，其余取ConfigManager中的当前权重
+    """
+    schema = schema or get_scoring_schema()
+    width = len(columns) if columns is not None else len(schema.columns)
+    if np is not None:
+        scores = np.asarray(scores, dtype=float)
+        if scores.ndim != 2 or scores.shape[1] != width:
+            raise ValueError(f"得分须为二维矩阵，每行 {width} 个子测试得分")
+    else:
+        scores = [[float(value) for value in row] for row in scores]
+        if not scores or any(len(row) != width for row in scores):
+            raise ValueError(f"得分须为二维矩阵，每行 {width} 个子测试得分")
+    if columns is not None:
+        order = schema.column_order(list(columns))
+        scores = scores[:, order] if np is not None else [[row[i] for i in order] for row in scores]
+    if models is not None and len(models) != len(scores):
+        raise ValueError("models 数量与得分行数不一致")
+
+    dimension_weights = get_config_manager().get_weight_values(schema.dimensions)
+    dimension_weights.update({dim: float(value) for dim, value in (weights or {}).items() if dim in dimension_weights})
+    weight_vector = [dimension_weights[dim] for dim in schema.dimensions]
+
+    if np is not None:
+        dimension_scores, weighted_scores, total_weighted, overall = _score_numpy(
+            scores, schema.sub_weight_matrix, weight_vector)
+    else:
+        dimension_scores, weighted_scores, total_weighted, overall = _score_python(scores, schema, weight_vector)
+
+    ranking = sorted(range(len(overall)), key=lambda i: overall[i], reverse=True)
+    ranks = [0] * len(overall)
+    for position, index in enumerate(ranking, start=1):
+        ranks[index] = position
+    return {
+        'dimensions': list(schema.dimensions),
+        'weights': dimension_weights,
+        'models': list(models) if models is not None else list(range(len(overall))),
+        'dimension_scores': dimension_scores,
+        'weighted_scores': weighted_scores,
+        'total_weighted_score': total_weighted,
+        'overall_score': overall,
+        'rank': ranks,
+        'engine': 'numpy' if np is not None else 'python'
+    }
+
+# 一次权重扫描最多计算的权重向量数
+MAX_SWEEP_POINTS = 100000
+
+def grid_weight_vectors(dimensions: Sequence[str], base: Dict[str, float],
+                        grid: Dict[str, Sequence[float]]) -> Tuple[List[List[float]], Dict[str, List[float]]]:
+    """网格扫描：grid中各维度取给定的取值列表（笛卡尔积），其余维度固定为base中的权重；返回(权重向量, 各轴取值)"""
+    if not isinstance(grid, dict):
+        raise ValueError("grid 须为 {维度: 权重取值列表} 对象")
+    unknown = [dim for dim in grid if dim not in dimensions]
+    if unknown:
+        raise ValueError(f"未知的维度: {', '.join(unknown)}")
+    for dim, values in grid.items():
+        if not isinstance(values, list) or not values or not all(
+                isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+                for value in values):
+            raise ValueError(f"grid.{dim} 须为非空的有限数值列表")
+    axes = {dim: [float(value) for value in values] for dim, values in grid.items()}
+    total = 1
+    for values in axes.values():
+        total *= len(values)
+    if not axes or total == 0:
+        raise ValueError("grid 至少需要一个非空维度")
+    if total > MAX_SWEEP_POINTS:
+        raise ValueError(f"权重组合数 {total} 超过上限 {MAX_SWEEP_POINTS}")
+    vectors = [[float(base[dim]) for dim in dimensions]]
+    for dim, values in axes.items():
+        column = dimensions.index(dim)
+        vectors = [vector[:column] + [value] + vector[column + 1:] for vector in vectors for value in values]
+    return vectors, axes
+
+def random_weight_vectors(dimensions: Sequence[str], samples: int, seed: int = None) -> List[List[float]]:
+    """随机扫描：在权重和为1的单纯形上均匀采样samples个权重向量"""
+    if not 0 < samples <= MAX_SWEEP_POINTS:
+        raise ValueError(f"samples 须在1到{MAX_SWEEP_POINTS}之间")
+    if np is not None:
+        return np.random.default_rng(seed).dirichlet(np.ones(len(dimensions)), size=samples).tolist()
+    import random
+    rng = random.Random(seed)
+    vectors = []
+    for _ in range(samples):
+        draws = [rng.expovariate(1.0) for _ in dimensions]
+        total = sum(draws)
+        vectors.append([draw / total for draw in draws])
+    return vectors
+
+def sweep_weights(dimension_scores: Sequence[Sequence[float]],
+                  weight_vectors: Sequence[Sequence[float]]) -> Dict[str, Any]:
+    """
+    用N个候选的维度得分(N×D)在K个权重向量(K×D)下重算综合得分与排名，不重新运行评估
+
+    返回overall_score与rank均为K×N（第k行对应第k个权重向量），best为每个权重向量下得分最高的候选序号
+    """
+    if np is not None:
+        scores = np.asarray(dimension_scores, dtype=float)
+        weights = np.asarray(weight_vectors, dtype=float)
+        if scores.ndim != 2 or weights.ndim != 2 or scores.shape[1] != weights.shape[1]:
+            raise ValueError("维度得分与权重向量的维度数不一致")
+        totals = weights.sum(axis=1, keepdims=True)
+        overall = np.divide(weights @ scores.T, totals, out=np.zeros((len(weights), len(scores))), where=totals > 0)
+        order = np.argsort(-overall, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, len(scores) + 1)[None, :].repeat(len(weights), axis=0), axis=1)
+        return {'overall_score': overall.tolist(), 'rank': ranks.tolist(), 'best': order[:, 0].tolist()}
+
+    if any(len(row) != len(weight_vectors[0]) for row in list(dimension_scores) + list(weight_vectors)):
+        raise ValueError("维度得分与权重向量的维度数不一致")
+    overall, ranks, best = [], [], []
+    for vector in weight_vectors:
+        total = sum(vector)
+        row = [sum(s * w for s, w in zip(scores, vector)) / total if total > 0 else 0.0 for scores in dimension_scores]
+        order = sorted(range(len(row)), key=lambda i: -row[i])
+        rank = [0] * len(row)
+        for position, index in enumerate(order, start=1):
+            rank[index] = position
+        overall.append(row)
+        ranks.append(rank)
+        best.append(order[0])
+    return {'overall_score': overall, 'rank': ranks, 'best': best}
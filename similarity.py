@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评估记录相似度与近重复索引
+"""
+
+import json
+import random
+import zlib
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# MinHash 签名长度与哈希参数：token哈希与系数都小于梅森素数2^31-1，乘积不超出uint64
+NUM_PERM = 128
+MERSENNE_PRIME = (1 << 31) - 1
+# 阈值上的真实匹配被LSH漏掉的概率上限
+MAX_MISS_PROBABILITY = 1e-6
+# 阈值过低时分桶几乎不能过滤候选，直接全量比较
+MIN_INDEXED_THRESHOLD = 0.3
+
+_rng = random.Random(20240601)
+PERM_A = [_rng.randrange(1, MERSENNE_PRIME) for _ in range(NUM_PERM)]
+PERM_B = [_rng.randrange(0, MERSENNE_PRIME) for _ in range(NUM_PERM)]
+
+def record_tokens(record: Any, prefix: str = '') -> FrozenSet[str]:
+    """把记录展开为"路径=值"形式的token集合，嵌套字典按路径展开，列表元素视为同一路径下的多个值"""
+    tokens: Set[str] = set()
+    stack = [(prefix, record)]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend((f'{path}.{key}' if path else str(key), item) for key, item in value.items())
+        elif isinstance(value, (list, tuple)):
+            stack.extend((f'{path}[]', item) for item in value)
+        else:
+            tokens.add(f'{path}={json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)}')
+    return frozenset(tokens)
+
+def jaccard_similarity(tokens_a: FrozenSet[str], tokens_b: FrozenSet[str]) -> float:
+    """两个token集合的Jaccard相似度，均为空时视为相同"""
+    if not tokens_a and not tokens_b:
+        return 1.0
+    intersection = len(tokens_a & tokens_b)
+    return intersection / (len(tokens_a) + len(tokens_b) - intersection)
+
+def minhash_signature(tokens: Iterable[str]) -> Tuple[int, ...]:
+    """MinHash签名：每个位置上两个集合签名相等的概率等于其Jaccard相似度"""
+    hashes = [zlib.crc32(token.encode('utf-8')) % MERSENNE_PRIME for token in tokens]
+    if not hashes:
+        return (MERSENNE_PRIME,) * NUM_PERM
+    if np is not None:
+        values = np.asarray(hashes, dtype=np.uint64)[:, None]
+        permuted = (values * np.asarray(PERM_A, dtype=np.uint64) + np.asarray(PERM_B, dtype=np.uint64)) % MERSENNE_PRIME
+        return tuple(permuted.min(axis=0).tolist())
+    return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in zip(PERM_A, PERM_B))
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """选择分带数b与每带行数r：在阈值处漏检概率不超过MAX_MISS_PROBABILITY的前提下r尽量大（候选最少）"""
+    bands, rows = num_perm, 1
+    for r in range(1, num_perm + 1):
+        b = num_perm // r
+        if (1 - threshold ** r) ** b <= MAX_MISS_PROBABILITY:
+            bands, rows = b, r
+    return bands, rows
+
+class SimilarityIndex:
+    """MinHash/LSH近重复索引：相似度超过阈值的记录以极高概率落入同一分桶，查询只需比较少量候选"""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.indexed = threshold >= MIN_INDEXED_THRESHOLD
+        self.bands, self.rows = lsh_params(threshold) if self.indexed else (0, 0)
+        self.tokens: List[FrozenSet[str]] = []
+        self._band_keys: List[List[int]] = []
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(self.bands)]
+
+    def _keys(self, tokens: FrozenSet[str]) -> List[int]:
+        signature = minhash_signature(tokens)
+        return [hash(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def add(self, tokens: FrozenSet[str]) -> int:
+        """追加一条记录，返回其序号"""
+        position = len(self.tokens)
+        self.tokens.append(tokens)
+        keys = self._keys(tokens) if self.indexed else []
+        self._band_keys.append(keys)
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, set()).add(position)
+        return position
+
+    def replace(self, position: int, tokens: FrozenSet[str]):
+        """用新记录替换指定序号的记录"""
+        for band, key in enumerate(self._band_keys[position]):
+            bucket = self._buckets[band][key]
+            bucket.discard(position)
+            if not bucket:
+                del self._buckets[band][key]
+        self.tokens[position] = tokens
+        keys = self._keys(tokens) if self.indexed else []
+        self._band_keys[position] = keys
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, set()).add(position)
+
+    def candidates(self, tokens: FrozenSet[str]) -> List[int]:
+        """可能相似的记录序号（升序）"""
+        if not self.indexed:
+            return list(range(len(self.tokens)))
+        found: Set[int] = set()
+        for band, key in enumerate(self._keys(tokens)):
+            found.update(self._buckets[band].get(key, ()))
+        return sorted(found)
+
+    def find_first(self, tokens: FrozenSet[str]) -> Optional[int]:
+        """序号最小的、与tokens相似度超过阈值的记录，不存在时返回None"""
+        for position in self.candidates(tokens):
+            if jaccard_similarity(tokens, self.tokens[position]) > self.threshold:
+                return position
+        return None
@@ -97,6 +97,9 @@ function initializeEventListeners() {
     // 运行评估器按钮
     document.getElementById('runEvaluator')?.addEventListener('click', runFusionEvaluator);
     
+    // 批量更新权重按钮
+    document.getElementById('updateAllWeights')?.addEventListener('click', updateAllWeights);
+    
     // 刷新数据按钮
     document.getElementById('refreshData')?.addEventListener('click', loadConfigData);
 }
@@ -196,35 +199,99 @@ async function updateWeight(dimension, newWeight) {
     }
 }
 
-// 运行融合评估器
+// 批量更新全部权重（一次请求、一次原子写入）
+async function updateAllWeights() {
+    const weights = {};
+    document.querySelectorAll('.update-btn').forEach(btn => {
+        const slider = btn.parentElement.querySelector('.weight-slider');
+        weights[btn.dataset.dimension] = parseFloat(slider.value);
+    });
+    
+    try {
+        const response = await fetch('/api/update_weights', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                weights: weights
+            })
+        });
+        
+        const result = await response.json();
+        
+        if (result.success) {
+            showActionResult('success', result.message);
+            loadConfigData();
+        } else {
+            showActionResult('error', result.error);
+        }
+        
+    } catch (error) {
+        showActionResult('error', `批量更新权重失败: ${error.message}`);
+    }
+}
+
+// 运行融合评估器（提交异步任务并通过SSE接收进度）
 async function runFusionEvaluator() {
     const btn = document.getElementById('runEvaluator');
     const originalText = btn.textContent;
     
+    const restoreButton = () => {
+        btn.textContent = originalText;
+        btn.disabled = false;
+    };
+    
     try {
         btn.textContent = '运行中...';
         btn.disabled = true;
         
-        const response = await fetch('/api/run_fusion_evaluator', {
+        const response = await fetch('/api/jobs', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-            }
+            },
+            body: JSON.stringify({})
         });
         
-        const result = await response.json();
+        const job = await response.json();
         
-        if (result.success) {
-            showActionResult('success', `${result.message}<br>输出: ${result.output}<br>时间: ${result.timestamp}`);
-        } else {
-            showActionResult('error', `运行失败: ${result.error}<br>错误输出: ${result.stderr || '无'}`);
+        if (!job.success) {
+            showActionResult('error', `运行失败: ${job.error}`);
+            restoreButton();
+            return;
         }
         
+        const source = new EventSource(`/api/jobs/${job.job_id}/events`);
+        
+        source.onmessage = function(e) {
+            const event = JSON.parse(e.data);
+            btn.textContent = event.message.replace(/^\[[^\]]*\]\s*/, '').slice(0, 20);
+        };
+        
+        source.addEventListener('end', async function() {
+            source.close();
+            const statusResponse = await fetch(`/api/jobs/${job.job_id}`);
+            const result = await statusResponse.json();
+            
+            if (result.status === 'succeeded') {
+                showActionResult('success', `融合评估器运行成功<br>配置文件: ${result.result.filename}<br>耗时: ${result.result.duration.toFixed(2)}秒<br>时间: ${result.result.timestamp}`);
+            } else {
+                showActionResult('error', `运行失败: ${result.error}`);
+            }
+            restoreButton();
+        });
+        
+        source.onerror = function() {
+            if (source.readyState === EventSource.CLOSED) {
+                showActionResult('error', '任务进度连接已断开');
+                restoreButton();
+            }
+        };
+        
     } catch (error) {
         showActionResult('error', `运行评估器失败: ${error.message}`);
-    } finally {
-        btn.textContent = originalText;
-        btn.disabled = false;
+        restoreButton();
     }
 }
 
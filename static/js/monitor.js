@@ -5,33 +5,20 @@ let currentRenameData = null;
 document.addEventListener('DOMContentLoaded', function() {
     initializeEventListeners();
     initializeFileOperations();
+    pollMonitorChanges();
 });
 
 // 初始化事件监听器
 function initializeEventListeners() {
-    // 传输文件按钮
-    document.querySelectorAll('.transfer-btn').forEach(btn => {
-        btn.addEventListener('click', function() {
-            const fileName = this.dataset.name;
-            transferFile(fileName);
-        });
-    });
-    
-    // 重命名文件按钮
-    document.querySelectorAll('.rename-btn').forEach(btn => {
-        btn.addEventListener('click', function() {
-            const folderType = this.dataset.folder;
-            const fileName = this.dataset.name;
-            showRenameModal(folderType, fileName);
-        });
+    // 文件操作按钮（事件委托，分页追加的条目同样生效）
+    document.querySelectorAll('.file-list').forEach(list => {
+        list.addEventListener('click', handleFileAction);
     });
     
-    // 删除文件按钮
-    document.querySelectorAll('.delete-btn').forEach(btn => {
+    // 加载更多按钮
+    document.querySelectorAll('.load-more-btn').forEach(btn => {
         btn.addEventListener('click', function() {
-            const folderType = this.dataset.folder;
-            const fileName = this.dataset.name;
-            deleteFile(folderType, fileName);
+            loadMoreFiles(this);
         });
     });
     
@@ -47,6 +34,179 @@ function initializeEventListeners() {
     });
 }
 
+// 处理文件操作按钮点击
+function handleFileAction(e) {
+    const btn = e.target.closest('button');
+    if (!btn) return;
+    
+    const fileName = btn.dataset.name;
+    const folderType = btn.dataset.folder;
+    
+    if (btn.classList.contains('transfer-btn')) {
+        transferFile(fileName);
+    } else if (btn.classList.contains('rename-btn')) {
+        showRenameModal(folderType, fileName);
+    } else if (btn.classList.contains('delete-btn')) {
+        deleteFile(folderType, fileName);
+    }
+}
+
+// 创建文件条目元素（与模板结构一致）
+function createFileItem(folderType, file) {
+    const item = document.createElement('div');
+    item.className = 'file-item';
+    item.dataset.name = file.name;
+    item.dataset.type = file.type;
+    
+    const info = document.createElement('div');
+    info.className = 'file-info';
+    
+    const icon = document.createElement('span');
+    icon.className = 'file-icon';
+    icon.textContent = file.type === 'file' ? '📄' : '📁';
+    info.appendChild(icon);
+    
+    const name = document.createElement('span');
+    name.className = 'file-name';
+    name.textContent = file.name;
+    info.appendChild(name);
+    
+    if (file.type === 'file') {
+        const modified = document.createElement('span');
+        modified.className = 'file-modified';
+        modified.textContent = file.modified;
+        info.appendChild(modified);
+    }
+    
+    const actions = document.createElement('div');
+    actions.className = 'file-actions';
+    const buttons = folderType === 'source'
+        ? [['transfer-btn', '传输'], ['rename-btn', '重命名'], ['delete-btn', '删除']]
+        : [['rename-btn', '重命名'], ['delete-btn', '删除']];
+    buttons.forEach(([cls, label]) => {
+        const btn = document.createElement('button');
+        btn.className = `action-btn small ${cls}`;
+        btn.dataset.name = file.name;
+        btn.dataset.folder = folderType;
+        btn.textContent = label;
+        actions.appendChild(btn);
+    });
+    
+    item.appendChild(info);
+    item.appendChild(actions);
+    return item;
+}
+
+// 加载下一页文件
+async function loadMoreFiles(btn) {
+    const folderType = btn.dataset.folder;
+    const offset = parseInt(btn.dataset.offset, 10);
+    const listId = folderType === 'source' ? 'sourceFileList' : 'targetFileList';
+    
+    try {
+        btn.disabled = true;
+        const params = new URLSearchParams({
+            folder: folderType,
+            sort: 'mtime',
+            order: 'desc',
+            offset: offset,
+            limit: MONITOR_PAGE_SIZE
+        });
+        const response = await fetch(`/api/monitor?${params}`);
+        const data = await response.json();
+        
+        if (data.error) {
+            showNotification(`加载失败: ${data.error}`, 'error');
+            return;
+        }
+        
+        const files = data[`${folderType}_files`];
+        const total = data[`${folderType}_total`];
+        const list = document.getElementById(listId);
+        files.forEach(file => {
+            // 期间新增的条目会使分页偏移，跳过已显示的条目
+            if (!findFileItem(list, file.name)) {
+                list.appendChild(createFileItem(folderType, file));
+            }
+        });
+        
+        btn.dataset.offset = offset + files.length;
+        btn.dataset.total = total;
+        if (offset + files.length >= total) {
+            btn.style.display = 'none';
+        }
+        
+        const totalLabel = document.querySelector(`.folder-total[data-folder="${folderType}"]`);
+        if (totalLabel) totalLabel.textContent = total;
+        
+    } catch (error) {
+        showNotification(`加载失败: ${error.message}`, 'error');
+    } finally {
+        btn.disabled = false;
+    }
+}
+
+// 查找列表中的文件条目
+function findFileItem(list, name) {
+    return list.querySelector(`.file-item[data-name="${CSS.escape(name)}"]`);
+}
+
+// 应用增量变更到页面
+function applyMonitorChanges(data) {
+    if (data.reset) {
+        location.reload();
+        return;
+    }
+    
+    ['source', 'target'].forEach(folderType => {
+        const list = document.getElementById(folderType === 'source' ? 'sourceFileList' : 'targetFileList');
+        const changes = data.changes[folderType];
+        if (!list || !changes) return;
+        
+        changes.removed.forEach(name => {
+            findFileItem(list, name)?.remove();
+        });
+        
+        changes.upserted.forEach(file => {
+            const item = createFileItem(folderType, file);
+            const existing = findFileItem(list, file.name);
+            if (existing) {
+                existing.replaceWith(item);
+            } else {
+                list.prepend(item);
+            }
+        });
+        
+        const totalLabel = document.querySelector(`.folder-total[data-folder="${folderType}"]`);
+        if (totalLabel) totalLabel.textContent = data.totals[folderType];
+    });
+    
+    monitorVersion = data.version;
+}
+
+// 立即获取一次增量变更
+async function refreshMonitorChanges() {
+    try {
+        const response = await fetch(`/api/monitor/changes?since=${encodeURIComponent(monitorVersion)}`);
+        applyMonitorChanges(await response.json());
+    } catch (error) {
+        showNotification(`刷新失败: ${error.message}`, 'error');
+    }
+}
+
+// 长轮询增量变更，无变更时服务端挂起等待
+async function pollMonitorChanges() {
+    while (true) {
+        try {
+            const response = await fetch(`/api/monitor/changes?since=${encodeURIComponent(monitorVersion)}&wait=25`);
+            applyMonitorChanges(await response.json());
+        } catch (error) {
+            // 网络异常时稍后重试
+            await new Promise(resolve => setTimeout(resolve, 5000));
+        }
+    }
+}
+
 // 初始化文件操作
 function initializeFileOperations() {
     // 添加文件拖拽功能
@@ -74,10 +234,8 @@ async function transferFile(fileName) {
         
         if (result.success) {
             showNotification(result.message, 'success');
-            // 刷新页面数据
-            setTimeout(() => {
-                location.reload();
-            }, 1000);
+            // 增量刷新列表
+            refreshMonitorChanges();
         } else {
             showNotification(`传输失败: ${result.error}`, 'error');
         }
@@ -140,10 +298,8 @@ async function confirmRename() {
         if (result.success) {
             showNotification(result.message, 'success');
             hideRenameModal();
-            // 刷新页面数据
-            setTimeout(() => {
-                location.reload();
-            }, 1000);
+            // 增量刷新列表
+            refreshMonitorChanges();
         } else {
             showNotification(`重命名失败: ${result.error}`, 'error');
         }
@@ -178,10 +334,8 @@ async function deleteFile(folderType, fileName) {
         
         if (result.success) {
             showNotification(result.message, 'success');
-            // 刷新页面数据
-            setTimeout(() => {
-                location.reload();
-            }, 1000);
+            // 增量刷新列表
+            refreshMonitorChanges();
         } else {
             showNotification(`删除失败: ${result.error}`, 'error');
         }